@@ -0,0 +1,131 @@
+'''
+Issue aggregation shared by the Flask and LSTM microservices.
+This file is kept identical in Flask/ and LSTM-forecast/, because each service is built from its own directory.
+1. issue_table() converts the list of issue records into a compact columnar table: one numpy datetime64[D]
+   array per date column, with NaT for issues that are not closed. This is the only Python level loop.
+2. Every count below is a vectorized np.bincount over that table, with the gaps between the first and last
+   period filled with zeros (the same output as pandas to_period + groupby + reindex(period_range)).
+3. summarize() computes every series and histogram used by the services in one pass over the table.
+4. daily_payload() is the compact form a date column is sent in from the Flask to the LSTM microservice:
+   the first day and the daily counts. days_from_payload() rebuilds the date column from it.
+'''
+import numpy as np
+
+WEEK_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+               'November', 'December']
+
+
+def to_days(values):
+    '''
+    Convert date strings ("2022-11-05" or "2022-11-05T10:00:00Z") to a datetime64[D] array, None becomes NaT
+    '''
+    return np.array([value[0:10] if value else 'NaT' for value in values], dtype='datetime64[D]')
+
+
+def issue_table(issues):
+    return {
+        "created_at": to_days([issue['created_at'] for issue in issues]),
+        "closed_at": to_days([issue['closed_at'] for issue in issues]),
+    }
+
+
+def drop_missing(days):
+    return days[~np.isnat(days)]
+
+
+def weekday_numbers(days):
+    # 1970-01-01 was a Thursday, Monday is 0
+    return (days.astype(np.int64) + 3) % 7
+
+
+def daily_counts(days):
+    '''
+    Return (first_day, counts) where counts[i] is the number of issues on first_day + i.
+    '''
+    days = drop_missing(days)
+    if len(days) == 0:
+        return None, np.zeros(0, dtype=np.int64)
+    first_day = days.min()
+    return first_day, np.bincount((days - first_day).astype(np.int64))
+
+
+def daily_payload(days):
+    '''
+    Return {"start": "2022-11-05", "counts": [...]} with the number of issues on every day from start on,
+    or None if there are no dates
+    '''
+    first_day, counts = daily_counts(days)
+    if first_day is None:
+        return None
+    return {"start": str(first_day), "counts": counts.tolist()}
+
+
+def days_from_payload(payload):
+    '''
+    Inverse of daily_payload(): the date column (without NaT), sorted by date
+    '''
+    if not payload:
+        return np.array([], dtype='datetime64[D]')
+    counts = np.asarray(payload["counts"], dtype=np.int64)
+    return np.repeat(np.datetime64(payload["start"], 'D') + np.arange(len(counts)), counts)
+
+
+def monthly_counts(days):
+    '''
+    Return [["2022-11", count], ...] for every month from the first to the last one
+    '''
+    days = drop_missing(days)
+    if len(days) == 0:
+        return []
+    months = days.astype('datetime64[M]')
+    first_month = months.min()
+    counts = np.bincount((months - first_month).astype(np.int64))
+    labels = first_month + np.arange(len(counts))
+    return [[str(label), int(count)] for label, count in zip(labels, counts)]
+
+
+def weekly_counts(days):
+    '''
+    Return [["2022-10-31/2022-11-06", count], ...] for every week (Monday to Sunday) from the first to the last one
+    '''
+    days = drop_missing(days)
+    if len(days) == 0:
+        return []
+    week_starts = days - weekday_numbers(days).astype('timedelta64[D]')
+    first_week = week_starts.min()
+    counts = np.bincount((week_starts - first_week).astype(np.int64) // 7)
+    labels = first_week + 7 * np.arange(len(counts))
+    return [[str(label) + '/' + str(label + 6), int(count)] for label, count in zip(labels, counts)]
+
+
+def weekday_histogram(days):
+    '''
+    Number of issues for every day of the week, Monday first
+    '''
+    return np.bincount(weekday_numbers(drop_missing(days)), minlength=7)
+
+
+def month_histogram(days):
+    '''
+    Number of issues for every month of the year, January first
+    '''
+    months = drop_missing(days).astype('datetime64[M]').astype(np.int64)
+    return np.bincount(months % 12, minlength=12)
+
+
+def summarize(table):
+    '''
+    Every series used by the services for both date columns of an issue table
+    '''
+    summary = {}
+    for column in ['created_at', 'closed_at']:
+        days = table[column]
+        summary[column] = {
+            "daily": daily_counts(days),
+            "weekly": weekly_counts(days),
+            "monthly": monthly_counts(days),
+            "weekdays": weekday_histogram(days),
+            "months": month_histogram(days),
+        }
+    return summary
@@ -1,11 +1,10 @@
-
 '''
 Goal of Flask Microservice:
-1. Flask will take the repository_name such as angular, angular-cli, material-design, D3 from the body of the api sent from React app and 
-   will utilize the GitHub API to fetch the created and closed issues. Additionally, it will also fetch the author_name and other 
+1. Flask will take the repository_name such as angular, angular-cli, material-design, D3 from the body of the api sent from React app and
+   will utilize the GitHub API to fetch the created and closed issues. Additionally, it will also fetch the author_name and other
    information for the created and closed issues.
 2. It will use group_by to group the data (created and closed issues) by month and will return the grouped data to client (i.e. React app).
-3. It will then use the data obtained from the GitHub API (i.e Repository information from GitHub) and pass it as a input request in the 
+3. It will then use the data obtained from the GitHub API (i.e Repository information from GitHub) and pass it as a input request in the
    POST body to LSTM microservice to predict and forecast the data.
 4. The response obtained from LSTM microservice is also return back to client (i.e. React app).
 
@@ -15,7 +14,7 @@ Use Python/GitHub API to retrieve Issues/Repos information of the past 1 year fo
 - https: // github.com/angular/angular-cli
 - https: // github.com/d3/d3
 '''
-# Import all the required packages 
+# Import all the required packages
 import os
 # import Flask
 from flask import Flask
@@ -23,13 +22,22 @@ from flask import jsonify
 from flask import request
 from flask import make_response
 from flask import Response
+from flask import stream_with_context
 from flask_cors import CORS
 import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 import dateutil.relativedelta
 from dateutil import *
 from datetime import date
-import pandas as pd
-import requests
+import numpy as np
+import aggregation
+import github_client
+import issue_store
+import repository_stats
+import lstm_client
+import prefetch
+import token_pool
 
 # Initilize flask app
 app = Flask(__name__)
@@ -52,154 +60,226 @@ def build_actual_response(response):
                          "PUT, GET, POST, DELETE, OPTIONS")
     return response
 
+# Repositories compared on the dashboard
+REPO_NAMES = ["",
+    "golang/go",
+    "google/go-github",
+    "angular/angular",
+    "angular/material",
+    "angular/angular-cli",
+    "SebastianM/angular-google-maps",
+    "d3/d3",
+    "facebook/react",
+    "tensorflow/tensorflow",
+    "keras-team/keras",
+    "pallets/flask"
+     ]
+# Repositories whose dashboards are prefetched in the background (see prefetch.py), comma separated
+TRACKED_REPOS = [name for name in os.environ.get('PREFETCH_REPOS', ','.join(REPO_NAMES)).split(',') if name]
+
 '''
-API route path is  "/api/forecast"
+API route path is  "/api/github"
 This API will accept only POST request
+Dashboards of the tracked repositories are served from the background prefetch while they are fresh
 '''
 @app.route('/api/github', methods=['POST'])
 def github():
     body = request.get_json()
     # Extract the choosen repositories from the request
     repo_name = body['repository']
-    # Add your own GitHub Token to run it local
-    token = os.environ.get(
-        'GITHUB_TOKEN', '')
-    GITHUB_URL = f"https://api.github.com/"
-    headers = {
-        "Authorization": f'token {token}'
-    }
-    params = {
-        "state": "open"
-    }
+    json_response = prefetch.result(repo_name)
+    if json_response is None:
+        json_response = build_dashboard(repo_name)
+        prefetch.store(repo_name, json_response)
+    # Return the response back to client (React app)
+    return jsonify(json_response)
+
+'''
+API route path is  "/api/github/stream"
+This API will accept only POST request, with the same body as "/api/github"
+Streams the dashboard section by section (see SECTIONS) as soon as each one is ready, instead of waiting for
+every GitHub call and forecast. Every section is sent as {"section": ..., "data": {...}}, where data holds keys of
+the "/api/github" response, and the stream ends with the section "done".
+Sent as Server-Sent Events (one "event: <section>" per section) by default, or as newline delimited JSON
+with "format": "ndjson" in the body.
+'''
+@app.route('/api/github/stream', methods=['POST'])
+def github_stream():
+    body = request.get_json()
+    # Extract the choosen repositories from the request
+    repo_name = body['repository']
+    ndjson = body.get('format') == 'ndjson'
+
+    def event(section, data):
+        message = json.dumps({"section": section, "data": data})
+        if ndjson:
+            return message + '\n'
+        return 'event: ' + section + '\ndata: ' + message + '\n\n'
+
+    def generate():
+        json_response = prefetch.result(repo_name)
+        if json_response is not None:
+            for section, data in split_sections(json_response):
+                yield event(section, data)
+        else:
+            json_response = {}
+            for section, data in dashboard_sections(repo_name):
+                json_response.update(data)
+                yield event(section, data)
+            prefetch.store(repo_name, json_response)
+        yield event("done", {})
+
+    return Response(stream_with_context(generate()),
+                    mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+                    # Proxies must pass every section on right away
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+'''
+API route path is  "/api/prefetch"
+Reports the state of the background prefetch and the GitHub quotas
+'''
+@app.route('/api/prefetch', methods=['GET'])
+def prefetch_status():
+    return jsonify(prefetch.status())
+
+'''
+API route path is  "/api/rate_limits"
+Reports the GitHub quota left of every token and the requests queued for quota
+'''
+@app.route('/api/rate_limits', methods=['GET'])
+def rate_limits():
+    return jsonify(token_pool.get_pool().metrics())
+
+'''
+Build the dashboard of a repository: its GitHub data, the data of the compared repositories and the
+forecasts of the LSTM microservice
+'''
+def build_dashboard(repo_name):
+    json_response = {}
+    for section, data in dashboard_sections(repo_name):
+        json_response.update(data)
+    return json_response
+
+'''
+Sections of the dashboard, in the order they are sent by "/api/github/stream", and the keys of the dashboard
+response every section holds. Each forecast is a section of its own.
+'''
+SECTIONS = [
+    ("repository", ["starCount", "forkCount"]),
+    ("totals", ["total_issues", "stars_count", "forks_count", "open_pulls_count"]),
+    ("monthly", ["created", "closed"]),
+    ("weekly", ["closed_at_issues_week"]),
+    ("branches", ["branchs"]),
+    ("created_forecast", ["createdAtImageUrls"]),
+    ("closed_forecast", ["closedAtImageUrls"]),
+    ("pulls_forecast", ["pullsImageUrls"]),
+]
+
+# Split a complete dashboard (e.g. a prefetched one) into its sections
+def split_sections(json_response):
+    return [(section, {key: json_response[key] for key in keys if key in json_response}) for section, keys in SECTIONS]
+
+# Creation days of every pull of a repository, read page by page
+def pull_days(url, headers):
+    pages = [aggregation.to_days([pull['created_at'] for pull in items])
+             for items in github_client.iter_pages(url, headers, ['created_at'])]
+    return np.concatenate(pages) if pages else aggregation.to_days([])
+
+'''
+Yield the sections of the dashboard of a repository as (section, data) as soon as each of them is ready,
+data holds the keys of the dashboard response listed in SECTIONS
+'''
+def dashboard_sections(repo_name):
+    # Add your own GitHub Token (or several, comma separated, in GITHUB_TOKENS) to run it local
+    # token_pool picks the token of every request
+    GITHUB_URL = github_client.GITHUB_URL
+    headers = {}
+    repo_names = REPO_NAMES
+
     repository_url = GITHUB_URL + "repos/" + repo_name
-    # Fetch GitHub data from GitHub API
-    repository = requests.get(repository_url, headers=headers)
-    # Convert the data obtained from GitHub API to JSON format
-    repository = repository.json()
-
-    today = date.today()
-
-    issues_reponse = []
-    # Iterating to get issues for every month for the past 24 months
-    for i in range(24):
-        last_month = today + dateutil.relativedelta.relativedelta(months=-1)
-        types = 'type:issue'
-        repo = 'repo:' + repo_name
-        ranges = 'created:' + str(last_month) + '..' + str(today)
-        # By default GitHub API returns only 30 results per page
-        # The maximum number of results per page is 100
-        # For more info, visit https://docs.github.com/en/rest/reference/repos 
-        per_page = 'per_page=100'
-        # Search query will create a query to fetch data for a given repository in a given time range
-        search_query = types + ' ' + repo + ' ' + ranges
-
-        # Append the search query to the GitHub API URL 
-        query_url = GITHUB_URL + "search/issues?q=" + search_query + "&" + per_page
-        # requsets.get will fetch requested query_url from the GitHub API
-        search_issues = requests.get(query_url, headers=headers, params=params)
-        # Convert the data obtained from GitHub API to JSON format
-        search_issues = search_issues.json()
-        issues_items = []
-        try:
-            # Extract "items" from search issues
-            issues_items = search_issues.get("items")
-        except KeyError:
-            error = {"error": "Data Not Available"}
-            resp = Response(json.dumps(error), mimetype='application/json')
-            resp.status_code = 500
-            return resp
-        if issues_items is None:
-            continue
-        for issue in issues_items:
-            label_name = []
-            data = {}
-            current_issue = issue
-            # Get issue number
-            data['issue_number'] = current_issue["number"]
-            # Get created date of issue
-            data['created_at'] = current_issue["created_at"][0:10]
-            if current_issue["closed_at"] == None:
-                data['closed_at'] = current_issue["closed_at"]
-            else:
-                # Get closed date of issue
-                data['closed_at'] = current_issue["closed_at"][0:10]
-            for label in current_issue["labels"]:
-                # Get label name of issue
-                label_name.append(label["name"])
-            data['labels'] = label_name
-            # It gives state of issue like closed or open
-            data['State'] = current_issue["state"]
-            # Get Author of issue
-            data['Author'] = current_issue["user"]["login"]
-            issues_reponse.append(data)
-
-        today = last_month
-
-    df = pd.DataFrame(issues_reponse)
 
     '''
-    Monthly Created Issues
-    Format the data by grouping the data by month
+    None of the GitHub calls depend on each other, so they are all started at once and every section is
+    sent as soon as the calls it needs are done.
+    github_client caps the number of requests in flight and backs off on secondary rate limits.
+    The stars, forks and issues created in the past 24 months of the selected and every listed repository
+    are read at once with GraphQL (see repository_stats.py).
+    The issues of the selected repository are synced into the local issue store, which only asks
+    GitHub for issues updated since the previous sync.
     '''
-    created_at_issues = []
-    closed_at_issues = []
-    if not df.empty:
-        # Daily Created Issues
-        df_created_at = df.groupby(['created_at'], as_index=False).count()
-        dataFrameCreated = df_created_at[['created_at', 'issue_number']]
-        dataFrameCreated.columns = ['date', 'count']
-        
-        created_at = df['created_at']
-        month_issue_created = pd.to_datetime(
-            pd.Series(created_at), format='%Y/%m/%d')
-        month_issue_created.index = month_issue_created.dt.to_period('m')
-        month_issue_created = month_issue_created.groupby(level=0).size()
-        month_issue_created = month_issue_created.reindex(pd.period_range(
-            month_issue_created.index.min(), month_issue_created.index.max(), freq='m'), fill_value=0)
-        month_issue_created_dict = month_issue_created.to_dict()
-        for key in month_issue_created_dict.keys():
-            array = [str(key), month_issue_created_dict[key]]
-            created_at_issues.append(array)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        # Each call runs in a copy of the request's context, so it keeps the priority of its GitHub requests
+        def submit(function, *args):
+            return executor.submit(contextvars.copy_context().run, function, *args)
+
+        stats_future = submit(repository_stats.fetch, repo_names + [repo_name],
+                              date.today() + dateutil.relativedelta.relativedelta(months=-24), date.today(), headers)
+        sync_future = submit(issue_store.sync_issues, repo_name, headers)
+        # Only the creation days of the pulls are needed, they are kept page by page as a compact array
+        pulls_future = submit(pull_days, repository_url + '/pulls?state=created', headers)
+        branch_future = submit(github_client.get_paginated, repository_url + '/branch', headers, ['name'])
+
+        stats = stats_future.result()
+        repository = stats[repo_name]
+        yield "repository", {
+            "starCount": repository["stargazers_count"],
+            "forkCount": repository["forks_count"],
+        }
+
+        total_issues = []
+        for i in range(len(repo_names)):
+            array = [repo_names[i], stats[repo_names[i]]["issues_count"]]
+            total_issues.append(array)
+
+        stars_count = []
+        forks_count = []
+        open_pulls_count = []
+        for i in range(len(repo_names)):
+            url_data = stats[repo_names[i]]
+            array = [repo_names[i], url_data["stargazers_count"]]
+            stars_count.append(array)
+            array = [repo_names[i], url_data["forks_count"]]
+            forks_count.append(array)
+            array = [repo_names[i], url_data["open_pulls_count"]]
+            open_pulls_count.append(array)
+
+        yield "totals", {
+            "total_issues": total_issues,
+            "stars_count": stars_count,
+            "forks_count": forks_count,
+            "open_pulls_count": open_pulls_count,
+        }
+
+        # The issue store sync has no result, its issues are read from the store below
+        sync_future.result()
+
+        # Issues created in the past 24 months
+        issues_reponse = issue_store.issues_created_since(
+            repo_name, date.today() + dateutil.relativedelta.relativedelta(months=-24))
 
         '''
-        Monthly Closed Issues
+        Monthly Created and Closed Issues
         Format the data by grouping the data by month
-        ''' 
-        
-        closed_at = df['closed_at'].sort_values(ascending=True)
-        month_issue_closed = pd.to_datetime(
-            pd.Series(closed_at), format='%Y/%m/%d')
-        month_issue_closed.index = month_issue_closed.dt.to_period('m')
-        month_issue_closed = month_issue_closed.groupby(level=0).size()
-        month_issue_closed = month_issue_closed.reindex(pd.period_range(
-            month_issue_closed.index.min(), month_issue_closed.index.max(), freq='m'), fill_value=0)
-        month_issue_closed_dict = month_issue_closed.to_dict()
-        for key in month_issue_closed_dict.keys():
-            array = [str(key), month_issue_closed_dict[key]]
-            closed_at_issues.append(array)
-
-    repository_url = GITHUB_URL + "repos/" + repo_name +'/pulls?state=created'
-    r = requests.get(repository_url, headers=headers)
-    pulls_response = r.json()
-    another_page = True
-    while another_page:
-        if 'next' in r.links:
-            r = requests.get(r.links['next']['url'], headers=headers)
-            pulls_response = pulls_response + r.json()
-        else:
-            another_page = False
-    
-    repository_url = GITHUB_URL + "repos/" + repo_name +'/branch'
-    r = requests.get(repository_url, headers=headers)
-    branch_response = r.json()
-    another_page = True
-    while another_page:
-        if 'next' in r.links:
-            r = requests.get(r.links['next']['url'], headers=headers)
-            branch_response = branch_response + r.json()
-        else:
-            another_page = False
-    
+        '''
+        issues_table = aggregation.issue_table(issues_reponse)
+        yield "monthly", {
+            "created": aggregation.monthly_counts(issues_table['created_at']),
+            "closed": aggregation.monthly_counts(issues_table['closed_at']),
+        }
+
+        # Issues created in the past 23 weeks
+        issues_reponse = issue_store.issues_created_since(
+            repo_name, date.today() + dateutil.relativedelta.relativedelta(weeks=-23))
+
+        # Weekly Closed Issues
+        yield "weekly", {
+            "closed_at_issues_week": aggregation.weekly_counts(aggregation.issue_table(issues_reponse)['closed_at'])
+        }
+
+        pulls_days = pulls_future.result()
+        branch_response = branch_future.result()
+        yield "branches", {"branchs": branch_response}
+
     # repository_url = GITHUB_URL + "repos/" + repo_name +'/commits'
     # r = requests.get(repository_url, headers=headers)
     # commits_response = r.json()
@@ -218,194 +298,52 @@ def github():
         3. On recieving a valid response from LSTM Microservice, append the above json_response with the response from
             LSTM microservice
     '''
-    created_at_body = {
-        "issues": issues_reponse,
-        "type": "created_at",
-        "repo": repo_name.split("/")[1]
-    }
-    closed_at_body = {
-        "issues": issues_reponse,
-        "type": "closed_at",
-        "repo": repo_name.split("/")[1]
-    }
-    
+    # Only the daily counts of the issue and pull dates are sent, every issues forecast draws the charts of
+    # both the created and the closed issues so it gets both columns
+    issues_daily = {column: aggregation.daily_payload(days) for column, days in issues_table.items()}
+    issues_bodies = [{
+        "type": column,
+        "repo": repo_name,
+        "daily": issues_daily
+    } for column in issues_table]
+
     pulls_response_body = {
         "repo": repo_name,
-        "pulls": pulls_response
+        "daily": {"pulls": aggregation.daily_payload(pulls_days)}
     }
-    
+
     # commits_response_body = {
     #     "repo": repo_name,
     #     "commits": commits_response
     # }
 
-    # Update your Google cloud deployed LSTM app URL (NOTE: DO NOT REMOVE "/")
-    LSTM_API_URL = "https://lstm-forecast-tqzys7bsda-uc.a.run.app/" + "api/forecast"
-
-    '''
-    Trigger the LSTM microservice to forecasted the created issues
-    The request body consists of created issues obtained from GitHub API in JSON format
-    The response body consists of Google cloud storage path of the images generated by LSTM microservice
     '''
-    created_at_response = requests.post(LSTM_API_URL,
-                                        json=created_at_body,
-                                        headers={'content-type': 'application/json'})
-    
+    Trigger the LSTM microservice to forecasted the created issues, closed issues and pulls
+    The request bodies consist of the daily counts obtained from GitHub API
+    The responses consist of Google cloud storage path of the images generated by LSTM microservice
+    The three forecasts are trained concurrently, each with its own timeout (see lstm_client.py), and each is
+    sent as soon as it is ready.
+    A forecast that fails or times out is returned as {"error": ..., "message": ...} and the others are still returned.
     '''
-    Trigger the LSTM microservice to forecasted the closed issues
-    The request body consists of closed issues obtained from GitHub API in JSON format
-    The response body consists of Google cloud storage path of the images generated by LSTM microservice
-    '''    
-    closed_at_response = requests.post(LSTM_API_URL,
-                                       json=closed_at_body,
-                                       headers={'content-type': 'application/json'})
-    
-    pulls_response_response = requests.post("https://lstm-forecast-tqzys7bsda-uc.a.run.app/api/pulls",
-                                       json=pulls_response_body,
-                                       headers={'content-type': 'application/json'})
-    
+    forecast_sections = [("created_forecast", "createdAtImageUrls"),
+                         ("closed_forecast", "closedAtImageUrls"),
+                         ("pulls_forecast", "pullsImageUrls")]
+    for index, forecast in lstm_client.forecast_each(
+            [("api/forecast", body) for body in issues_bodies] + [("api/pulls", pulls_response_body)]):
+        section, key = forecast_sections[index]
+        yield section, {key: {**forecast}}
+
     # commits_response_response = requests.post("https://lstm-forecast-tqzys7bsda-uc.a.run.app/api/commits",
     #                                    json=commits_response_body,
     #                                    headers={'content-type': 'application/json'})
-    
-    '''
-    Create the final response that consists of:
-        1. GitHub repository data obtained from GitHub API
-        2. Google cloud image urls of created and closed issues obtained from LSTM microservice
-    '''
-
-    repo_names = ["",
-        "golang/go",
-        "google/go-github",
-        "angular/angular",
-        "angular/material",
-        "angular/angular-cli",
-        "SebastianM/angular-google-maps",
-        "d3/d3",
-        "facebook/react",
-        "tensorflow/tensorflow",
-        "keras-team/keras",
-        "pallets/flask"
-         ]
-    total_issues = []
-    for i in range(len(repo_names)):
-        types = 'type:issue'
-        repo = 'repo:' + repo_names[i]
-        ranges = 'created:' + str(date.today() + dateutil.relativedelta.relativedelta(months=-24)) + '..' + str(date.today())
-        per_page = 'per_page=100'
-        search_query = types + ' ' + repo + ' ' + ranges
-        query_url = GITHUB_URL + "search/issues?q=" + search_query + "&" + per_page
-        r = requests.get(query_url, headers=headers, params=params)
-        array = [repo_names[i],  0 if r.json().get("total_count") is None else r.json().get("total_count")]
-        total_issues.append(array)
-
-    stars_count = []
-    forks_count = []
-    for i in range(len(repo_names)):
-        url = GITHUB_URL + "repos/" + repo_names[i]
-        url_data = requests.get(url, headers=headers)
-        url_data = url_data.json()
-        array = [repo_names[i], url_data["stargazers_count"]]
-        stars_count.append(array)
-        array = [repo_names[i], url_data["forks_count"]]
-        forks_count.append(array)
-
-    today = date.today()
-    issues_reponse = []
-    for i in range(23):
-        last_week = today + dateutil.relativedelta.relativedelta(weeks=-1)
-        types = 'type:issue'
-        repo = 'repo:' + repo_name
-        ranges = 'created:' + str(last_week) + '..' + str(today)
-        per_page = 'per_page=100'
-        # Search query will create a query to fetch data for a given repository in a given time range
-        search_query = types + ' ' + repo + ' ' + ranges
-
-        # Append the search query to the GitHub API URL 
-        query_url = GITHUB_URL + "search/issues?q=" + search_query + "&" + per_page
-        # requsets.get will fetch requested query_url from the GitHub API
-        search_issues = requests.get(query_url, headers=headers, params=params)
-        # Convert the data obtained from GitHub API to JSON format
-        search_issues = search_issues.json()
-        issues_items = []
-        try:
-            # Extract "items" from search issues
-            issues_items = search_issues.get("items")
-        except KeyError:
-            error = {"error": "Data Not Available"}
-            resp = Response(json.dumps(error), mimetype='application/json')
-            resp.status_code = 500
-            print(resp)
-        if issues_items is None:
-            continue
-        for issue in issues_items:
-            label_name = []
-            data = {}
-            current_issue = issue
-            # Get issue number
-            data['issue_number'] = current_issue["number"]
-            # Get created date of issue
-            data['created_at'] = current_issue["created_at"][0:10]
-            if current_issue["closed_at"] == None:
-                data['closed_at'] = current_issue["closed_at"]
-            else:
-                # Get closed date of issue
-                data['closed_at'] = current_issue["closed_at"][0:10]
-            for label in current_issue["labels"]:
-                # Get label name of issue
-                label_name.append(label["name"])
-            data['labels'] = label_name
-            # It gives state of issue like closed or open
-            data['State'] = current_issue["state"]
-            # Get Author of issue
-            data['Author'] = current_issue["user"]["login"]
-            issues_reponse.append(data)
-
-        today = last_week
-
-    df = pd.DataFrame(issues_reponse)
-    
-    closed_at_issues_week = []
-    if not df.empty:
-        closed_at = df['closed_at'].sort_values(ascending=True)
-        month_issue_closed = pd.to_datetime(
-            pd.Series(closed_at), format='%Y/%m/%d')
-        month_issue_closed.index = month_issue_closed.dt.to_period('w')
-        month_issue_closed = month_issue_closed.groupby(level=0).size()
-        month_issue_closed = month_issue_closed.reindex(pd.period_range(
-            month_issue_closed.index.min(), month_issue_closed.index.max(), freq='w'), fill_value=0)
-        month_issue_closed_dict = month_issue_closed.to_dict()
-        for key in month_issue_closed_dict.keys():
-            array = [str(key), month_issue_closed_dict[key]]
-            closed_at_issues_week.append(array)
-
-    json_response = {
-        "created": created_at_issues,
-        "closed": closed_at_issues,
-        "starCount": repository["stargazers_count"],
-        "forkCount": repository["forks_count"],
-        "createdAtImageUrls": {
-            **created_at_response.json(),
-        },
-        "closedAtImageUrls": {
-            **closed_at_response.json(),
-        },
-        "pullsImageUrls": {
-            **pulls_response_response.json(),
-        },
-        # "commitsImageUrls": {
-        #     **commits_response_response.json(),
-        # },
-        "total_issues": total_issues,
-        "stars_count": stars_count,
-        "forks_count": forks_count,
-        "closed_at_issues_week": closed_at_issues_week,
-        "branchs": branch_response
-    }
-    # Return the response back to client (React app)
-    return jsonify(json_response)
+    # "commitsImageUrls": {
+    #     **commits_response_response.json(),
+    # },
 
 
 # Run flask app server on port 5000
 if __name__ == '__main__':
+    # With debug=True the app runs in a reloader child process, only that one prefetches
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        prefetch.start(build_dashboard, TRACKED_REPOS)
     app.run(debug=True, host='0.0.0.0', port=8080)
@@ -0,0 +1,131 @@
+'''
+Response cache for GitHub API calls made by github_client.
+1. Entries are keyed by the request url plus its query parameters and hold the status, the headers we need
+   (ETag, Link, Content-Type), the raw body and the time they were fetched.
+2. An entry younger than GITHUB_CACHE_TTL seconds is served without contacting GitHub. Older entries are
+   revalidated with If-None-Match, and a 304 answer (which does not count against the GitHub quota) refreshes them.
+3. Both backends evict the least recently used entry once GITHUB_CACHE_MAX_ENTRIES is reached.
+   "memory" keeps entries in the process, "sqlite" keeps them in a local file so they survive a restart,
+   and "none" disables caching.
+'''
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+CACHE_BACKEND = os.environ.get('GITHUB_CACHE_BACKEND', 'memory')
+CACHE_TTL = float(os.environ.get('GITHUB_CACHE_TTL', '300'))
+CACHE_MAX_ENTRIES = int(os.environ.get('GITHUB_CACHE_MAX_ENTRIES', '2048'))
+CACHE_PATH = os.environ.get('GITHUB_CACHE_PATH', 'github_cache.sqlite3')
+
+
+def cache_key(url, params=None):
+    if not params:
+        return url
+    return url + '|' + json.dumps(params, sort_keys=True)
+
+
+class MemoryCache:
+    '''
+    In process LRU cache. Entries are dicts with "status", "headers", "body" and "fetched_at".
+    '''
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SqliteCache:
+    '''
+    LRU cache stored in a local sqlite file so cache hits survive a restart.
+    '''
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                fetched_at REAL,
+                last_used REAL
+            )''')
+        self.connection.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT status, headers, body, fetched_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+            self.connection.commit()
+        return {"status": row[0], "headers": json.loads(row[1]), "body": row[2], "fetched_at": row[3]}
+
+    def set(self, key, entry):
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (key, entry["status"], json.dumps(entry["headers"]), entry["body"], entry["fetched_at"], time.time()))
+            self.connection.execute('''
+                DELETE FROM responses WHERE key NOT IN (
+                    SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)''', (self.max_entries,))
+            self.connection.commit()
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute('DELETE FROM responses')
+            self.connection.commit()
+
+
+BACKENDS = {
+    "memory": MemoryCache,
+    "sqlite": SqliteCache,
+}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    '''
+    Return the process wide cache selected by GITHUB_CACHE_BACKEND, or None when caching is disabled.
+    '''
+    global _cache
+    if CACHE_BACKEND == 'none':
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = BACKENDS[CACHE_BACKEND]()
+    return _cache
+
+
+def is_fresh(entry, ttl=None):
+    if ttl is None:
+        ttl = CACHE_TTL
+    return time.time() - entry["fetched_at"] < ttl
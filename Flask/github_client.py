@@ -0,0 +1,312 @@
+'''
+GitHub fetch layer for the Flask microservice.
+1. Every call to the GitHub API goes through get(), which backs off and retries when GitHub answers with
+   a secondary rate limit (403/429 with Retry-After or a "secondary rate limit" message).
+2. fetch_all() runs independent calls concurrently. The number of requests in flight across the whole
+   process is capped by GITHUB_MAX_CONCURRENCY, because GitHub penalises bursts of parallel requests.
+3. Requests are sent through the shared "github" session from http_sessions, so connections are reused,
+   with the token token_pool picks for them.
+4. Successful responses are kept in github_cache. Fresh entries are served without a request and stale
+   entries are revalidated with their ETag.
+5. search_range() returns every search result in a time range, splitting it into smaller windows when it
+   holds more results than the search API will return for one query.
+6. iter_pages() streams a paginated list page by page, fetching the next pages ahead and keeping only the
+   fields the caller needs of every item.
+7. rate_limits() returns the quota left of every rate limit resource ("core", "search", ...) over all tokens,
+   so background work can leave enough of it for interactive requests.
+'''
+import os
+import json
+import re
+import math
+import time
+import threading
+import contextvars
+from datetime import timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.structures import CaseInsensitiveDict
+import http_sessions
+import github_cache
+import token_pool
+
+GITHUB_URL = "https://api.github.com/"
+# Point it to graphql_standin.py to run without GitHub
+GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL', GITHUB_URL + "graphql")
+
+# GitHub recommends against large numbers of concurrent requests, keep this small
+MAX_CONCURRENCY = int(os.environ.get('GITHUB_MAX_CONCURRENCY', '8'))
+# How many times a rate limited request is retried before its response is returned as is
+MAX_RETRIES = int(os.environ.get('GITHUB_MAX_RETRIES', '3'))
+# Never sleep longer than this (in seconds) for a single retry
+MAX_BACKOFF = float(os.environ.get('GITHUB_MAX_BACKOFF', '60'))
+
+# How many pages iter_pages() requests ahead of the page being read
+PAGE_PREFETCH = int(os.environ.get('GITHUB_PAGE_PREFETCH', '4'))
+
+# The search API never returns more than 1000 results for one query, whatever page is asked for
+SEARCH_RESULT_CAP = 1000
+# The maximum number of results per page is 100
+SEARCH_PER_PAGE = 100
+SEARCH_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Shared by every thread so the cap holds even when several dashboard requests run at once
+_in_flight = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+
+def build_headers(token, headers=None):
+    headers = dict(headers or {})
+    if token:
+        headers["Authorization"] = f'token {token}'
+    return headers
+
+
+def retry_delay(response, attempt):
+    '''
+    Return how long to wait before retrying a rate limited response, or None if it should not be retried.
+    For more info, visit https://docs.github.com/en/rest/overview/resources-in-the-rest-api#secondary-rate-limits
+    '''
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), MAX_BACKOFF)
+        except ValueError:
+            return None
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset is None:
+            return None
+        wait = int(reset) - time.time()
+        # Primary limit resets too far in the future, let the caller see the 403
+        if wait > MAX_BACKOFF:
+            return None
+        return max(wait, 1)
+    if 'secondary rate limit' in response.text.lower():
+        return min(2 ** (attempt + 1), MAX_BACKOFF)
+    return None
+
+
+def rate_limits():
+    '''
+    {resource: {"limit", "remaining", "reset"}} of all the tokens together, as reported by GitHub
+    '''
+    return token_pool.get_pool().totals()
+
+
+def send(url, headers=None, params=None, json=None):
+    '''
+    GET a GitHub API url (or POST json to it) with a token of the pool, retrying with back-off on secondary rate limits.
+    A request refused because its token ran out of quota is retried with the next token the pool hands out.
+    '''
+    pool = token_pool.get_pool()
+    resource = token_pool.resource(url)
+    method = "GET" if json is None else "POST"
+    for attempt in range(MAX_RETRIES + 1):
+        token = pool.acquire(resource)
+        request_headers = build_headers(token, headers)
+        with _in_flight:
+            response = http_sessions.get_session("github").request(method, url, headers=request_headers, params=params,
+                                                                   json=json, timeout=http_sessions.get_timeout("github"))
+        pool.update(token, response)
+        if attempt == MAX_RETRIES:
+            return response
+        if token_pool.exhausted(response):
+            continue
+        wait = retry_delay(response, attempt)
+        if wait is None:
+            return response
+        time.sleep(wait)
+    return response
+
+
+def graphql(query, variables=None):
+    '''
+    Run a GraphQL query and return its response. GitHub only answers GraphQL queries sent with a token.
+    '''
+    return send(GRAPHQL_URL, json={"query": query, "variables": variables or {}})
+
+
+# Only the headers needed to rebuild a response are cached, rate limit headers would be stale
+CACHED_HEADERS = ['ETag', 'Link', 'Content-Type']
+
+
+def cache_entry(response):
+    return {
+        "status": response.status_code,
+        "headers": {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+        "body": response.content,
+        "fetched_at": time.time(),
+    }
+
+
+def cached_response(entry, url):
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"]
+    response.url = url
+    response.encoding = 'utf-8'
+    return response
+
+
+def project(response, fields):
+    '''
+    Reduce every item of a successful list response to fields, in place, so only they are kept and cached
+    '''
+    if fields is None or response.status_code != 200:
+        return response
+    items = response.json()
+    if isinstance(items, list):
+        response._content = json.dumps([{field: item.get(field) for field in fields} for item in items]).encode()
+    return response
+
+
+def get(url, headers=None, params=None, fields=None):
+    '''
+    GET a GitHub API url through the response cache.
+    Returns a requests.Response either way, so callers can use .json() and .links as usual.
+    With fields, the items of a list response are reduced to those fields before they are cached and returned.
+    '''
+    cache = github_cache.get_cache()
+    if cache is None:
+        return project(send(url, headers=headers, params=params), fields)
+    key = github_cache.cache_key(url, params)
+    if fields is not None:
+        key += '|fields=' + ','.join(fields)
+    entry = cache.get(key)
+    if entry is not None and github_cache.is_fresh(entry):
+        return cached_response(entry, url)
+
+    request_headers = dict(headers or {})
+    if entry is not None and 'ETag' in entry["headers"]:
+        request_headers['If-None-Match'] = entry["headers"]['ETag']
+    response = send(url, headers=request_headers, params=params)
+    if response.status_code == 304 and entry is not None:
+        entry["fetched_at"] = time.time()
+        cache.set(key, entry)
+        return cached_response(entry, url)
+    project(response, fields)
+    if response.status_code == 200:
+        cache.set(key, cache_entry(response))
+    return response
+
+
+def page_urls(response):
+    '''
+    URLs of the pages after response when they are numbered (its "next" and "last" links have a page parameter),
+    None when only the "next" link is known
+    '''
+    if 'next' not in response.links or 'last' not in response.links:
+        return None
+    next_url = response.links['next']['url']
+    first = re.search(r'[?&]page=(\d+)', next_url)
+    last = re.search(r'[?&]page=(\d+)', response.links['last']['url'])
+    if first is None or last is None:
+        return None
+    return [next_url[:first.start(1)] + str(page) + next_url[first.end(1):]
+            for page in range(int(first.group(1)), int(last.group(1)) + 1)]
+
+
+def iter_pages(url, headers=None, fields=None):
+    '''
+    Follow the pages of a paginated list endpoint and yield its items page by page, reduced to fields.
+    Up to PAGE_PREFETCH pages are already requested while the caller works on the current one (only the next one
+    when the pages are not numbered), so no more than those pages are held, however many pages there are.
+    A page that is not a list (an error) ends the iteration.
+    '''
+    with ThreadPoolExecutor(max_workers=PAGE_PREFETCH) as executor:
+        def fetch(page_url):
+            return executor.submit(contextvars.copy_context().run, get, page_url, headers, None, fields)
+
+        r = get(url, headers=headers, fields=fields)
+        urls = page_urls(r)
+        pending = deque()
+        while True:
+            if urls is None:
+                if 'next' in r.links:
+                    pending.append(fetch(r.links['next']['url']))
+            else:
+                while urls and len(pending) < PAGE_PREFETCH:
+                    pending.append(fetch(urls.pop(0)))
+            items = r.json() if r.status_code == 200 else None
+            if not isinstance(items, list):
+                for future in pending:
+                    future.cancel()
+                return
+            yield items
+            if not pending:
+                return
+            r = pending.popleft().result()
+
+
+def get_paginated(url, headers=None, fields=None):
+    '''
+    Every item of a paginated list endpoint in one list, reduced to fields (see iter_pages())
+    '''
+    result = []
+    for items in iter_pages(url, headers, fields):
+        result.extend(items)
+    return result
+
+
+def search_url(query, page=1):
+    return GITHUB_URL + "search/issues?q=" + query + "&per_page=" + str(SEARCH_PER_PAGE) + "&page=" + str(page)
+
+
+def split_range(start, end, parts):
+    '''
+    Split the inclusive range start..end (whole seconds) into at most parts consecutive ranges that do not overlap.
+    '''
+    seconds = int((end - start).total_seconds()) + 1
+    parts = min(parts, seconds)
+    bounds = [start + timedelta(seconds=seconds * i // parts) for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1] - timedelta(seconds=1)) for i in range(parts)]
+
+
+def search_range(query, field, start, end, headers=None):
+    '''
+    Return every issue matching query whose field ("created", "updated" or "closed") lies between start and end,
+    or None if GitHub did not answer one of the requests. start and end are inclusive UTC datetimes.
+    The search API only returns the first 1000 results of a query, so a range with more results is split into
+    smaller windows (sized from its total_count) until each fits. The pages of every window are then fetched concurrently.
+    '''
+    window_query = query + ' ' + field + ':' + start.strftime(SEARCH_TIME_FORMAT) + '..' + end.strftime(SEARCH_TIME_FORMAT)
+    r = get(search_url(window_query), headers=headers)
+    if r.status_code != 200:
+        return None
+    first_page = r.json()
+    total_count = first_page.get("total_count") or 0
+
+    if total_count > SEARCH_RESULT_CAP and end > start:
+        # Aim for windows about half full so most of them fit on the first try
+        windows = split_range(start, end, math.ceil(2 * total_count / SEARCH_RESULT_CAP))
+        results = fetch_all([(search_range, (query, field, window_start, window_end, headers))
+                             for window_start, window_end in windows])
+        if None in results:
+            return None
+        return [issue for items in results for issue in items]
+
+    pages = math.ceil(min(total_count, SEARCH_RESULT_CAP) / SEARCH_PER_PAGE)
+    responses = fetch_all([(get, (search_url(window_query, page), headers)) for page in range(2, pages + 1)])
+    items = list(first_page.get("items") or [])
+    for r in responses:
+        if r.status_code != 200:
+            return None
+        items.extend(r.json().get("items") or [])
+    return items
+
+
+def fetch_all(calls):
+    '''
+    Run independent calls concurrently and return their results in the same order.
+    calls is a list of (function, args) tuples, e.g. [(get, (url, headers, params)), ...]
+    '''
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(calls))) as executor:
+        # Each call runs in a copy of the caller's context, so it keeps the priority of its requests (see token_pool)
+        futures = [executor.submit(contextvars.copy_context().run, function, *args) for function, args in calls]
+        return [future.result() for future in futures]
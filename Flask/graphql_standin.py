@@ -0,0 +1,85 @@
+'''
+Local stand-in for the GitHub GraphQL API, to run and test the Flask microservice without GitHub.
+1. It answers the repository statistics queries of repository_stats.py on POST "/graphql": for every aliased
+   repository r<n> and issue search i<n> it returns the statistics of the repository named by the variables
+   $owner<n>, $name<n> and $issues<n>.
+2. The statistics come from the JSON file STANDIN_STATS ({"owner/name": {"stargazerCount", "forkCount",
+   "openPulls", "issueCount"}}), a repository missing from it is not found like on GitHub. Without the file
+   every repository exists with made up (but always the same) numbers.
+3. Like GitHub it refuses requests without a token (401) and sends the X-RateLimit-* headers of the "graphql" resource.
+Run it with `python graphql_standin.py` and start the Flask app with GITHUB_GRAPHQL_URL=http://localhost:8090/graphql
+'''
+import os
+import json
+import time
+import zlib
+import threading
+from flask import Flask
+from flask import jsonify
+from flask import request
+
+STATS_PATH = os.environ.get('STANDIN_STATS')
+PORT = int(os.environ.get('GRAPHQL_STANDIN_PORT', '8090'))
+RATE_LIMIT = 5000
+
+app = Flask(__name__)
+_used = {"count": 0, "reset": 0}
+_lock = threading.Lock()
+
+
+def load_stats():
+    if not STATS_PATH:
+        return None
+    with open(STATS_PATH) as stats_file:
+        return json.load(stats_file)
+
+
+def repository_stats(repo_name, stats):
+    if stats is not None:
+        return stats.get(repo_name)
+    seed = zlib.crc32(repo_name.encode())
+    return {"stargazerCount": seed % 100000, "forkCount": seed % 20000,
+            "openPulls": seed % 500, "issueCount": seed % 5000}
+
+
+def rate_limit_headers():
+    with _lock:
+        now = int(time.time())
+        if now >= _used["reset"]:
+            _used.update(count=0, reset=now + 3600)
+        _used["count"] += 1
+        return {"X-RateLimit-Resource": "graphql", "X-RateLimit-Limit": str(RATE_LIMIT),
+                "X-RateLimit-Remaining": str(max(RATE_LIMIT - _used["count"], 0)),
+                "X-RateLimit-Reset": str(_used["reset"])}
+
+
+@app.route('/graphql', methods=['POST'])
+def graphql():
+    if not request.headers.get('Authorization'):
+        return jsonify({"message": "This endpoint requires you to be authenticated."}), 401
+    variables = request.get_json().get("variables") or {}
+    stats = load_stats()
+    data = {}
+    errors = []
+    i = 0
+    while f'owner{i}' in variables:
+        repo_name = variables[f'owner{i}'] + '/' + variables[f'name{i}']
+        repository = repository_stats(repo_name, stats)
+        if repository is None:
+            data[f'r{i}'] = None
+            data[f'i{i}'] = {"issueCount": 0}
+            errors.append({"type": "NOT_FOUND", "path": [f'r{i}'],
+                           "message": "Could not resolve to a Repository with the name '" + repo_name + "'."})
+        else:
+            data[f'r{i}'] = {"stargazerCount": repository["stargazerCount"], "forkCount": repository["forkCount"],
+                             "pullRequests": {"totalCount": repository["openPulls"]}}
+            data[f'i{i}'] = {"issueCount": repository["issueCount"]}
+        i += 1
+    body = {"data": data}
+    if errors:
+        body["errors"] = errors
+    return jsonify(body), 200, rate_limit_headers()
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=PORT)
@@ -0,0 +1,98 @@
+'''
+Shared HTTP sessions for the Flask microservice.
+1. One requests.Session per upstream (GitHub API and LSTM microservice) is created on first use and reused by
+   every request and thread in the process, so TCP and TLS connections are kept alive between calls.
+2. Each session has a connection pool sized for the concurrency we use against that upstream, retries with
+   back-off on 5xx responses and a (connect, read) timeout so a slow upstream can never hang a worker.
+   Rate limit responses (403/429) from GitHub are retried by github_client, which knows how to read GitHub's headers.
+'''
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def timeout_from_env(name, connect, read):
+    '''
+    Read a "connect,read" timeout in seconds from the environment, e.g. GITHUB_TIMEOUT=5,30
+    '''
+    value = os.environ.get(name)
+    if not value:
+        return (connect, read)
+    parts = [float(part) for part in value.split(',')]
+    return (parts[0], parts[-1])
+
+
+'''
+Settings for every upstream
+pool_size: number of keep-alive connections held open to the host
+block: wait for one of them when they are all busy, otherwise open an extra connection (closed after use)
+retries: number of retries on 5xx responses and connection errors
+methods: HTTP methods that are retried after a read timeout or a 5xx response, connection errors are
+         retried for every method because the request was never sent
+retry_after: follow the Retry-After header, urllib3 then also retries 413, 429 and 503 responses that have one
+timeout: (connect, read) timeout in seconds
+'''
+UPSTREAMS = {
+    "github": {
+        "pool_size": int(os.environ.get('GITHUB_POOL_SIZE', '16')),
+        "block": True,
+        "retries": int(os.environ.get('GITHUB_HTTP_RETRIES', '3')),
+        "methods": ["GET", "POST"],
+        # 429 and its Retry-After are left to github_client and token_pool, which rotate tokens and cap the wait
+        "retry_after": False,
+        "timeout": timeout_from_env('GITHUB_TIMEOUT', 5, 30),
+    },
+    # Training a model takes a while, so the LSTM microservice gets a long read timeout
+    # A forecast POST is never sent twice: a retry would start the whole training again,
+    # and a forecast that fails once fails every time
+    # A forecast never waits for a connection, its time is bounded by the deadline of lstm_client
+    "lstm": {
+        "pool_size": int(os.environ.get('LSTM_POOL_SIZE', '8')),
+        "block": False,
+        "retries": int(os.environ.get('LSTM_HTTP_RETRIES', '2')),
+        "methods": ["GET"],
+        "retry_after": True,
+        "timeout": timeout_from_env('LSTM_TIMEOUT', 5, 300),
+    },
+}
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def build_session(upstream):
+    settings = UPSTREAMS[upstream]
+    retry = Retry(total=settings["retries"],
+                  backoff_factor=0.5,
+                  status_forcelist=[500, 502, 503, 504],
+                  allowed_methods=frozenset(settings["methods"]),
+                  respect_retry_after_header=settings["retry_after"],
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1,
+                          pool_maxsize=settings["pool_size"],
+                          pool_block=settings["block"],
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(upstream):
+    '''
+    Return the process wide session for an upstream ("github" or "lstm"), creating it on first use.
+    '''
+    session = _sessions.get(upstream)
+    if session is None:
+        with _lock:
+            session = _sessions.get(upstream)
+            if session is None:
+                session = build_session(upstream)
+                _sessions[upstream] = session
+    return session
+
+
+def get_timeout(upstream):
+    return UPSTREAMS[upstream]["timeout"]
@@ -0,0 +1,150 @@
+'''
+Local store of GitHub issues for the Flask microservice.
+1. Issues are normalized to the record the client already receives (issue_number, created_at, closed_at,
+   labels, State, Author) and kept in a local sqlite file (ISSUE_STORE_PATH), one row per repository and issue number.
+2. Every repository has a high-water mark: the time its last sync started. The first sync backfills every issue
+   created in the past 24 months, later syncs only ask the search API for issues updated since the mark,
+   so the fetch cost grows with the number of changed issues instead of the full history.
+3. The monthly and weekly aggregations in github() read their issues from the store.
+'''
+import os
+import json
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+import dateutil.relativedelta
+import github_client
+
+STORE_PATH = os.environ.get('ISSUE_STORE_PATH', 'issues.sqlite3')
+# Re-read issues updated shortly before the last sync, the search index lags a little behind GitHub
+SYNC_OVERLAP = timedelta(seconds=int(os.environ.get('ISSUE_SYNC_OVERLAP', '600')))
+# How far back the first sync of a repository goes
+HISTORY_MONTHS = 24
+
+
+# Convert an issue returned by the GitHub search API into the record sent to the client
+def issue_record(current_issue):
+    label_name = []
+    data = {}
+    # Get issue number
+    data['issue_number'] = current_issue["number"]
+    # Get created date of issue
+    data['created_at'] = current_issue["created_at"][0:10]
+    if current_issue["closed_at"] == None:
+        data['closed_at'] = current_issue["closed_at"]
+    else:
+        # Get closed date of issue
+        data['closed_at'] = current_issue["closed_at"][0:10]
+    for label in current_issue["labels"]:
+        # Get label name of issue
+        label_name.append(label["name"])
+    data['labels'] = label_name
+    # It gives state of issue like closed or open
+    data['State'] = current_issue["state"]
+    # Get Author of issue
+    data['Author'] = current_issue["user"]["login"]
+    return data
+
+
+class IssueStore:
+
+    def __init__(self, path=STORE_PATH):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS issues (
+                repo TEXT,
+                number INTEGER,
+                created_at TEXT,
+                closed_at TEXT,
+                labels TEXT,
+                state TEXT,
+                author TEXT,
+                PRIMARY KEY (repo, number)
+            );
+            CREATE INDEX IF NOT EXISTS issues_created ON issues (repo, created_at);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                repo TEXT PRIMARY KEY,
+                last_sync TEXT
+            );''')
+        self.connection.commit()
+
+    def upsert(self, repo_name, records):
+        rows = [(repo_name, record['issue_number'], record['created_at'], record['closed_at'],
+                 json.dumps(record['labels']), record['State'], record['Author']) for record in records]
+        with self.lock:
+            self.connection.executemany('INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self.connection.commit()
+
+    def last_sync(self, repo_name):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT last_sync FROM sync_state WHERE repo = ?', (repo_name,)).fetchone()
+        return None if row is None else datetime.fromisoformat(row[0])
+
+    def set_last_sync(self, repo_name, synced_at):
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?)',
+                                    (repo_name, synced_at.isoformat()))
+            self.connection.commit()
+
+    def issues(self, repo_name, created_since):
+        '''
+        Return the records of issues created on or after created_since (a date), newest first.
+        '''
+        with self.lock:
+            rows = self.connection.execute('''
+                SELECT number, created_at, closed_at, labels, state, author FROM issues
+                WHERE repo = ? AND created_at >= ? ORDER BY created_at DESC, number DESC''',
+                (repo_name, str(created_since))).fetchall()
+        return [{
+            'issue_number': row[0],
+            'created_at': row[1],
+            'closed_at': row[2],
+            'labels': json.loads(row[3]),
+            'State': row[4],
+            'Author': row[5],
+        } for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+# One lock per repository so concurrent requests for the same repository sync it only once
+_sync_locks = {}
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IssueStore()
+    return _store
+
+
+def sync_issues(repo_name, headers):
+    '''
+    Bring the stored issues of a repository up to date and move its high-water mark forward.
+    '''
+    store = get_store()
+    with _store_lock:
+        lock = _sync_locks.setdefault(repo_name, threading.Lock())
+    with lock:
+        started_at = datetime.now(timezone.utc).replace(microsecond=0)
+        last_sync = store.last_sync(repo_name)
+        query = 'type:issue repo:' + repo_name
+        if last_sync is None:
+            first_day = date.today() + dateutil.relativedelta.relativedelta(months=-HISTORY_MONTHS)
+            since = datetime.combine(first_day, datetime.min.time(), tzinfo=timezone.utc)
+            items = github_client.search_range(query, 'created', since, started_at, headers)
+        else:
+            items = github_client.search_range(query, 'updated', last_sync - SYNC_OVERLAP, started_at, headers)
+        # Keep the old mark if a query failed, so the next sync asks for the missing issues again
+        if items is None:
+            return
+        store.upsert(repo_name, [issue_record(issue) for issue in items])
+        store.set_last_sync(repo_name, started_at)
+
+
+def issues_created_since(repo_name, created_since):
+    return get_store().issues(repo_name, created_since)
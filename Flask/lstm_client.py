@@ -0,0 +1,96 @@
+'''
+Client of the LSTM microservice for the Flask microservice.
+1. forecast() posts one body to one LSTM endpoint through the shared "lstm" session from http_sessions.
+   It never raises: when the call fails, times out or answers with an error, its result is an error marker
+   {"error": ..., "message": ...} instead of the forecast, so the rest of the dashboard can still be returned.
+2. forecast_all() sends several forecasts concurrently, so the dashboard waits as long as the slowest of them
+   and not as long as all of them together. Each call keeps its own (connect, read) timeout (see TIMEOUTS), and the whole
+   fan-out is bounded by LSTM_DEADLINE seconds. Calls still running at the deadline are reported as timed out.
+   Every fan-out runs on its own threads and the read timeout of its calls is cut to the deadline, so a call left
+   running after the deadline ends soon after it and never holds up the forecasts of later requests.
+   Forecasts are not retried (see http_sessions.py), only connection errors are.
+3. forecast_each() yields every forecast as soon as it is ready, for the streaming dashboard.
+'''
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import requests
+import http_sessions
+
+# Update your Google cloud deployed LSTM app URL (NOTE: DO NOT REMOVE "/")
+LSTM_URL = os.environ.get('LSTM_URL', "https://lstm-forecast-tqzys7bsda-uc.a.run.app/")
+# Longest time in seconds a dashboard request waits for all of its forecasts
+DEADLINE = float(os.environ.get('LSTM_DEADLINE', str(http_sessions.get_timeout("lstm")[1])))
+# (connect, read) timeout of every endpoint, e.g. LSTM_PULLS_TIMEOUT=5,120
+TIMEOUTS = {
+    "api/forecast": http_sessions.timeout_from_env('LSTM_FORECAST_TIMEOUT', *http_sessions.get_timeout("lstm")),
+    "api/pulls": http_sessions.timeout_from_env('LSTM_PULLS_TIMEOUT', *http_sessions.get_timeout("lstm")),
+    "api/commits": http_sessions.timeout_from_env('LSTM_COMMITS_TIMEOUT', *http_sessions.get_timeout("lstm")),
+}
+
+
+def error_marker(error, message):
+    return {"error": error, "message": message}
+
+
+def forecast(path, body, timeout=None):
+    '''
+    POST body to the LSTM endpoint path (e.g. "api/pulls") and return its JSON response or an error marker
+    '''
+    try:
+        response = http_sessions.get_session("lstm").post(LSTM_URL + path,
+                                                          json=body,
+                                                          headers={'content-type': 'application/json'},
+                                                          timeout=timeout or TIMEOUTS.get(path, http_sessions.get_timeout("lstm")))
+    except requests.exceptions.Timeout as error:
+        return error_marker("timeout", str(error))
+    except requests.exceptions.RequestException as error:
+        return error_marker("unavailable", str(error))
+    if response.status_code != 200:
+        return error_marker("status " + str(response.status_code), response.text[:200])
+    try:
+        return response.json()
+    except ValueError as error:
+        return error_marker("invalid response", str(error))
+
+
+def capped_timeout(path, timeout, deadline):
+    connect, read = timeout or TIMEOUTS.get(path, http_sessions.get_timeout("lstm"))
+    return connect, min(read, deadline)
+
+
+def forecast_each(calls, deadline=None):
+    '''
+    Run forecasts concurrently and yield (index of the call, result) as each of them finishes.
+    calls is a list of (path, body) or (path, body, timeout) tuples, e.g. [("api/pulls", pulls_body), ...]
+    '''
+    deadline = DEADLINE if deadline is None else deadline
+    executor = ThreadPoolExecutor(max_workers=max(len(calls), 1))
+    futures = {}
+    for index, call in enumerate(calls):
+        path, body = call[0], call[1]
+        timeout = capped_timeout(path, call[2] if len(call) > 2 else None, deadline)
+        futures[executor.submit(forecast, path, body, timeout)] = index
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            pending.discard(future)
+            yield futures[future], future.result()
+    except FutureTimeoutError:
+        for future in pending:
+            index = futures[future]
+            yield index, error_marker("timeout", calls[index][0] + " did not answer within " + str(deadline) + " s")
+    finally:
+        # Calls still running finish on their own, their read timeout ends with the deadline
+        executor.shutdown(wait=False)
+
+
+def forecast_all(calls, deadline=None):
+    '''
+    Run forecasts concurrently and return their results in the same order as calls (see forecast_each())
+    '''
+    results = [None] * len(calls)
+    for index, result in forecast_each(calls, deadline):
+        results[index] = result
+    return results
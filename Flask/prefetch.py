@@ -0,0 +1,154 @@
+'''
+Background prefetch of the dashboards of the tracked repositories for the Flask microservice.
+1. start() runs a scheduler thread that rebuilds the dashboard (GitHub stats, issue history and LSTM forecasts)
+   of every tracked repository every PREFETCH_INTERVAL seconds. github() answers requests for those repositories
+   with the latest result (see result()) instead of building the dashboard while the user waits.
+2. Every run is moved by a random jitter of up to PREFETCH_JITTER of the interval, and the first runs are spread
+   over that jitter as well, so the tracked repositories do not all hit GitHub at the same moment.
+3. At most PREFETCH_CONCURRENCY dashboards are rebuilt at once.
+4. A refresh only starts while GitHub reports more than PREFETCH_RESERVE (a fraction) of the core and search
+   quotas left, the rest is kept for interactive requests. Otherwise it is postponed until the quota resets.
+   Its GitHub requests are background requests, queued behind the interactive ones (see token_pool.py).
+5. A dashboard with a failed forecast (an error marker, see lstm_client.py) never replaces a good one that is
+   still fresh. Without one it is kept for PREFETCH_ERROR_MAX_AGE seconds only, and the refresh is tried again
+   after PREFETCH_RETRY_INTERVAL seconds instead of the full interval.
+6. status() reports when every repository was last refreshed, how long it took and its last error.
+'''
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import github_client
+import token_pool
+
+INTERVAL = float(os.environ.get('PREFETCH_INTERVAL', '900'))
+JITTER = float(os.environ.get('PREFETCH_JITTER', '0.1'))
+CONCURRENCY = int(os.environ.get('PREFETCH_CONCURRENCY', '2'))
+RESERVE = float(os.environ.get('PREFETCH_RESERVE', '0.5'))
+# Older results are not served, the dashboard is built for the request instead
+MAX_AGE = float(os.environ.get('PREFETCH_MAX_AGE', str(2 * INTERVAL)))
+# Dashboards with a failed forecast are served for this long at most
+ERROR_MAX_AGE = float(os.environ.get('PREFETCH_ERROR_MAX_AGE', '60'))
+RETRY_INTERVAL = float(os.environ.get('PREFETCH_RETRY_INTERVAL', '120'))
+# Rate limit resources a refresh uses
+RESOURCES = ['core', 'search']
+# How often (in seconds) the scheduler looks for due repositories
+POLL = 1
+
+_results = {}
+_state = {}
+_lock = threading.Lock()
+
+
+def jittered(seconds):
+    return max(seconds * (1 + random.uniform(-JITTER, JITTER)), 0)
+
+
+def has_errors(response):
+    '''
+    True when a section of a dashboard is an error marker {"error": ..., "message": ...}
+    '''
+    return any(isinstance(value, dict) and "error" in value for value in response.values())
+
+
+def max_age(state):
+    return ERROR_MAX_AGE if state["failed"] else MAX_AGE
+
+
+def budget_wait(now):
+    '''
+    Seconds until the GitHub quota allows a background refresh, 0 if it allows one now.
+    The quotas are the ones of the latest responses, so refreshes already running are not accounted for yet,
+    PREFETCH_CONCURRENCY keeps that overshoot small.
+    '''
+    wait = 0
+    for resource, quota in github_client.rate_limits().items():
+        if resource not in RESOURCES or not quota["limit"] or not quota["reset"]:
+            continue
+        if quota["remaining"] <= quota["limit"] * RESERVE:
+            wait = max(wait, quota["reset"] - now + 1)
+    return wait
+
+
+def refresh(build, repo_name):
+    start = time.time()
+    try:
+        response = token_pool.background(build, repo_name)
+        store(repo_name, response)
+        error = "forecast failed" if has_errors(response) else None
+    except Exception as exception:
+        error = repr(exception)
+    with _lock:
+        _state[repo_name].update({
+            "running": False,
+            "duration": time.time() - start,
+            "error": error,
+            "next_run": time.time() + jittered(RETRY_INTERVAL if error else INTERVAL),
+        })
+
+
+def run(build):
+    executor = ThreadPoolExecutor(max_workers=CONCURRENCY)
+    while True:
+        now = time.time()
+        with _lock:
+            due = [repo_name for repo_name, state in _state.items() if not state["running"] and state["next_run"] <= now]
+            running = sum(state["running"] for state in _state.values())
+        for repo_name in due[:max(CONCURRENCY - running, 0)]:
+            wait = budget_wait(now)
+            with _lock:
+                if wait > 0:
+                    _state[repo_name]["next_run"] = now + wait + random.uniform(0, JITTER * INTERVAL)
+                    _state[repo_name]["postponed"] += 1
+                    continue
+                _state[repo_name]["running"] = True
+            executor.submit(refresh, build, repo_name)
+        time.sleep(POLL)
+
+
+def start(build, repo_names):
+    '''
+    Prefetch the dashboards of repo_names in the background, build(repo_name) returns the dashboard of a repository
+    '''
+    now = time.time()
+    with _lock:
+        for repo_name in repo_names:
+            _state[repo_name] = {"running": False, "next_run": now + random.uniform(0, JITTER * INTERVAL),
+                                 "computed_at": None, "failed": False, "duration": None, "error": None, "postponed": 0}
+    threading.Thread(target=run, args=(build,), daemon=True).start()
+
+
+def store(repo_name, response):
+    '''
+    Keep the dashboard of a tracked repository, whether it was built in the background or for a request.
+    A dashboard with a failed forecast does not replace a fresh good one.
+    '''
+    failed = has_errors(response)
+    with _lock:
+        state = _state.get(repo_name)
+        if state is None:
+            return
+        now = time.time()
+        if failed and state["computed_at"] is not None and not state["failed"] and now - state["computed_at"] <= MAX_AGE:
+            return
+        _results[repo_name] = response
+        state.update(computed_at=now, failed=failed)
+
+
+def result(repo_name):
+    '''
+    The latest dashboard of a tracked repository, None if there is none yet or it is older than PREFETCH_MAX_AGE
+    (PREFETCH_ERROR_MAX_AGE if one of its forecasts failed)
+    '''
+    with _lock:
+        state = _state.get(repo_name)
+        if state is None or state["computed_at"] is None or time.time() - state["computed_at"] > max_age(state):
+            return None
+        return _results.get(repo_name)
+
+
+def status():
+    with _lock:
+        repos = {repo_name: dict(state) for repo_name, state in _state.items()}
+    return {"repos": repos, "rate_limits": github_client.rate_limits()}
@@ -0,0 +1,103 @@
+'''
+Statistics of the compared repositories for the Flask microservice.
+1. fetch() returns the stars, forks, issues created in a date range and open pull requests of many repositories.
+2. They are read with GraphQL: one aliased query asks for up to GRAPHQL_BATCH_SIZE repositories at once, so the
+   whole list costs one or two round trips instead of two REST calls (a repository and a search) per repository.
+3. Without a token GitHub does not answer GraphQL, and a query can fail as a whole. The statistics are then read
+   with the REST calls as before, which do not return the number of open pull requests (it is None).
+4. graphql_standin.py answers the same queries locally, set GITHUB_GRAPHQL_URL to use it.
+'''
+import os
+import github_client
+
+GRAPHQL_BATCH_SIZE = int(os.environ.get('GRAPHQL_BATCH_SIZE', '25'))
+
+
+def empty_stats():
+    return {"stargazers_count": 0, "forks_count": 0, "issues_count": 0, "open_pulls_count": 0}
+
+
+def issues_query(repo_name, since, until):
+    return 'type:issue repo:' + repo_name + ' created:' + str(since) + '..' + str(until)
+
+
+def build_query(repo_names, since, until):
+    '''
+    One query for all repo_names, the fields of the n-th repository are aliased r<n> and its issue search i<n>
+    '''
+    definitions = []
+    fields = []
+    variables = {}
+    for i, repo_name in enumerate(repo_names):
+        owner, name = repo_name.split('/')
+        definitions.append(f'$owner{i}: String!, $name{i}: String!, $issues{i}: String!')
+        fields.append(f'r{i}: repository(owner: $owner{i}, name: $name{i}) '
+                      '{ stargazerCount forkCount pullRequests(states: OPEN) { totalCount } }')
+        fields.append(f'i{i}: search(query: $issues{i}, type: ISSUE, first: 1) {{ issueCount }}')
+        variables.update({f'owner{i}': owner, f'name{i}': name, f'issues{i}': issues_query(repo_name, since, until)})
+    query = 'query(' + ', '.join(definitions) + ') {\n  ' + '\n  '.join(fields) + '\n}'
+    return query, variables
+
+
+def graphql_stats(repo_names, since, until):
+    '''
+    Statistics of repo_names read with one GraphQL query, None if the query failed
+    '''
+    query, variables = build_query(repo_names, since, until)
+    response = github_client.graphql(query, variables)
+    if response.status_code != 200:
+        return None
+    data = response.json().get("data")
+    if data is None:
+        return None
+    stats = {}
+    for i, repo_name in enumerate(repo_names):
+        stats[repo_name] = empty_stats()
+        # A repository that does not exist is null, with an entry in "errors"
+        repository = data.get(f'r{i}')
+        if repository is not None:
+            stats[repo_name]["stargazers_count"] = repository["stargazerCount"]
+            stats[repo_name]["forks_count"] = repository["forkCount"]
+            stats[repo_name]["open_pulls_count"] = repository["pullRequests"]["totalCount"]
+        search = data.get(f'i{i}')
+        if search is not None:
+            stats[repo_name]["issues_count"] = search["issueCount"]
+    return stats
+
+
+def rest_stats(repo_names, since, until, headers=None):
+    '''
+    Statistics of repo_names read with a repository call and a search per repository
+    '''
+    calls = [(github_client.get, (github_client.GITHUB_URL + "repos/" + repo_name, headers)) for repo_name in repo_names]
+    calls += [(github_client.get, (github_client.search_url(issues_query(repo_name, since, until)), headers))
+              for repo_name in repo_names]
+    results = github_client.fetch_all(calls)
+    stats = {}
+    for repo_name, repository, search in zip(repo_names, results, results[len(repo_names):]):
+        repository = repository.json() if repository.status_code == 200 else {}
+        search = search.json() if search.status_code == 200 else {}
+        stats[repo_name] = {
+            "stargazers_count": repository.get("stargazers_count", 0),
+            "forks_count": repository.get("forks_count", 0),
+            "issues_count": search.get("total_count") or 0,
+            "open_pulls_count": None,
+        }
+    return stats
+
+
+def fetch(repo_names, since, until, headers=None):
+    '''
+    {repo_name: {"stargazers_count", "forks_count", "issues_count", "open_pulls_count"}} of every repository,
+    issues_count counts the issues created between the dates since and until.
+    A name that is not "owner/name" gets zeros, like a repository GitHub does not know.
+    '''
+    valid = list(dict.fromkeys(repo_name for repo_name in repo_names if repo_name.count('/') == 1))
+    batches = [valid[i:i + GRAPHQL_BATCH_SIZE] for i in range(0, len(valid), GRAPHQL_BATCH_SIZE)]
+    stats = {}
+    for batch_stats in github_client.fetch_all([(graphql_stats, (batch, since, until)) for batch in batches]):
+        if batch_stats is None:
+            stats = rest_stats(valid, since, until, headers)
+            break
+        stats.update(batch_stats)
+    return {repo_name: stats.get(repo_name, empty_stats()) for repo_name in repo_names}
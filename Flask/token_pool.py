@@ -0,0 +1,204 @@
+'''
+Pool of GitHub tokens for github_client.
+1. The tokens are read from GITHUB_TOKENS (comma separated), or GITHUB_TOKEN for a single one. Without any token
+   requests are sent anonymously.
+2. The quota of every token is tracked separately for every rate limit resource ("core", "search", "graphql"),
+   from the X-RateLimit-* headers of its responses and counted down for the requests in flight.
+3. acquire() hands out the token with the most quota left for the resource of a request. When no token has any
+   left, the request is queued until one resets (at most GITHUB_MAX_QUEUE_WAIT seconds) instead of being sent
+   to be answered with a 403.
+4. Requests are interactive (a user is waiting) unless they run inside background(), like the prefetch.
+   Queued interactive requests get the next free quota before background ones, and background requests leave
+   GITHUB_BACKGROUND_RESERVE (a fraction) of every quota to interactive ones.
+5. metrics() reports the remaining quota of every token (tokens are numbered, never shown) and the queue.
+'''
+import os
+import time
+import threading
+import contextvars
+from urllib.parse import urlparse
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+MAX_QUEUE_WAIT = float(os.environ.get('GITHUB_MAX_QUEUE_WAIT', '60'))
+BACKGROUND_RESERVE = float(os.environ.get('GITHUB_BACKGROUND_RESERVE', '0.2'))
+
+# Priority of the requests of the current request handler or background job
+priority = contextvars.ContextVar('github_priority', default=INTERACTIVE)
+
+
+def background(function, *args):
+    '''
+    Call function with the GitHub requests it makes marked as background requests
+    '''
+    def run():
+        priority.set(BACKGROUND)
+        return function(*args)
+    return contextvars.copy_context().run(run)
+
+
+def read_tokens():
+    value = os.environ.get('GITHUB_TOKENS') or os.environ.get('GITHUB_TOKEN', '')
+    return [token.strip() for token in value.split(',') if token.strip()] or ['']
+
+
+def resource(url):
+    '''
+    Rate limit resource a GitHub API url counts against
+    '''
+    path = urlparse(url).path
+    if path.startswith('/search/'):
+        return 'search'
+    if path.endswith('/graphql'):
+        return 'graphql'
+    return 'core'
+
+
+def exhausted(response):
+    '''
+    True when a response was refused because the quota of its token ran out
+    '''
+    return response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0'
+
+
+class TokenPool:
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        # token -> resource -> {"limit", "remaining", "reset"}, a resource is missing until GitHub reported it
+        self.quotas = {token: {} for token in tokens}
+        self.condition = threading.Condition()
+        self.waiting = {}
+        self.counters = {"requests": 0, "queued": 0, "queue_timeouts": 0, "rate_limited": 0}
+
+    def remaining(self, token, resource, now):
+        '''
+        Quota left to a token, None if it is not known (never used, or its window has reset since)
+        '''
+        quota = self.quotas[token].get(resource)
+        if quota is None or (quota["reset"] is not None and quota["reset"] <= now):
+            return None
+        return quota["remaining"]
+
+    def usable(self, token, resource, level, now):
+        remaining = self.remaining(token, resource, now)
+        if remaining is None:
+            return True
+        quota = self.quotas[token][resource]
+        if level == BACKGROUND and quota["limit"]:
+            return remaining > quota["limit"] * BACKGROUND_RESERVE
+        return remaining > 0
+
+    def pick(self, resource, level, now):
+        tokens = [token for token in self.tokens if self.usable(token, resource, level, now)]
+        if not tokens:
+            return None
+        # Unknown quotas first, they are probably full
+        return max(tokens, key=lambda token: float('inf') if self.remaining(token, resource, now) is None
+                   else self.remaining(token, resource, now))
+
+    def next_reset(self, resource, now):
+        resets = [quota["reset"] for quotas in self.quotas.values() for name, quota in quotas.items()
+                  if name == resource and quota["reset"] is not None and quota["reset"] > now]
+        return min(resets) if resets else now + 1
+
+    def acquire(self, resource):
+        '''
+        Return the token the next request to resource should use, waiting in the queue while none has quota left
+        '''
+        level = priority.get()
+        deadline = time.time() + MAX_QUEUE_WAIT
+        queued = False
+        with self.condition:
+            key = (resource, level)
+            self.waiting[key] = self.waiting.get(key, 0) + 1
+            try:
+                while True:
+                    now = time.time()
+                    # Background requests let queued interactive requests go first
+                    if level == INTERACTIVE or not self.waiting.get((resource, INTERACTIVE)):
+                        token = self.pick(resource, level, now)
+                        if token is not None:
+                            break
+                    if now >= deadline:
+                        # Let GitHub answer rather than queue for ever, the caller sees its 403
+                        self.counters["queue_timeouts"] += 1
+                        token = min(self.tokens, key=lambda token: self.quotas[token].get(resource, {}).get("reset") or 0)
+                        break
+                    if not queued:
+                        queued = True
+                        self.counters["queued"] += 1
+                    self.condition.wait(max(min(deadline, self.next_reset(resource, now)) - now, 0.05))
+            finally:
+                self.waiting[key] -= 1
+            self.counters["requests"] += 1
+            if self.remaining(token, resource, now):
+                self.quotas[token][resource]["remaining"] -= 1
+            self.condition.notify_all()
+        return token
+
+    def update(self, token, response):
+        '''
+        Record the quota GitHub reported in the response to a request made with token
+        '''
+        name = response.headers.get('X-RateLimit-Resource')
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if name is None or remaining is None:
+            return
+        quota = {
+            "limit": int(response.headers.get('X-RateLimit-Limit', 0)) or None,
+            "remaining": int(remaining),
+            "reset": int(response.headers.get('X-RateLimit-Reset', 0)) or None,
+        }
+        with self.condition:
+            previous = self.quotas[token].get(name)
+            # Responses of the same window can arrive out of order, and the count of the requests still in flight
+            # is already taken off, so within a window the quota only goes down
+            if previous is not None and previous["reset"] == quota["reset"]:
+                quota["remaining"] = min(quota["remaining"], previous["remaining"])
+            self.quotas[token][name] = quota
+            if exhausted(response):
+                self.counters["rate_limited"] += 1
+            self.condition.notify_all()
+
+    def totals(self):
+        '''
+        {resource: {"limit", "remaining", "reset"}} summed over the tokens, reset is the earliest one
+        '''
+        now = time.time()
+        result = {}
+        with self.condition:
+            for token, quotas in self.quotas.items():
+                for name, quota in quotas.items():
+                    total = result.setdefault(name, {"limit": 0, "remaining": 0, "reset": None})
+                    total["limit"] += quota["limit"] or 0
+                    remaining = self.remaining(token, name, now)
+                    total["remaining"] += (quota["limit"] or 0) if remaining is None else remaining
+                    if quota["reset"] is not None and quota["reset"] > now:
+                        total["reset"] = quota["reset"] if total["reset"] is None else min(total["reset"], quota["reset"])
+        return result
+
+    def metrics(self):
+        now = time.time()
+        with self.condition:
+            tokens = {}
+            for number, token in enumerate(self.tokens, 1):
+                tokens["token " + str(number)] = {name: dict(quota, remaining=self.remaining(token, name, now),
+                                                             reset_in=None if quota["reset"] is None else max(quota["reset"] - now, 0))
+                                                  for name, quota in self.quotas[token].items()}
+            waiting = {resource + ' ' + level: count for (resource, level), count in self.waiting.items() if count}
+            return {"tokens": tokens, "waiting": waiting, **self.counters}
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = TokenPool(read_tokens())
+    return _pool
@@ -12,25 +12,42 @@ from dateutil import *
 import dateutil.relativedelta
 from datetime import date
 from datetime import timedelta
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import time
 from flask_cors import CORS
 import requests
-
-# Tensorflow (Keras & LSTM) related packages
-import tensorflow as tf
-from tensorflow.python.keras import Sequential
-from tensorflow.python.keras.layers import Input, Dense, LSTM, Dropout
-from tensorflow.python.keras.callbacks import EarlyStopping
-from sklearn.preprocessing import MinMaxScaler
-from keras.preprocessing.sequence import TimeseriesGenerator
 import json
+import aggregation
+import preprocessing
+import model_registry
+import response_cache
+import jobs
+import rollout
+import warmup
+import charts
+import image_storage
+from lazy_imports import LazyModule, LazyAttribute
 
-# Import required storage package from Google Cloud Storage
-from google.cloud import storage
+'''
+The heavy packages are imported on first use (or by the warm up once the server is up), not here,
+so the server starts in a fraction of a second
+'''
+pd = LazyModule('pandas')
+mdates = LazyModule('matplotlib.dates')
+
+# Tensorflow (Keras & LSTM) related packages
+tf = LazyModule('tensorflow')
+Sequential = LazyAttribute('tensorflow.python.keras', 'Sequential')
+Input = LazyAttribute('tensorflow.python.keras.layers', 'Input')
+Dense = LazyAttribute('tensorflow.python.keras.layers', 'Dense')
+LSTM = LazyAttribute('tensorflow.python.keras.layers', 'LSTM')
+Dropout = LazyAttribute('tensorflow.python.keras.layers', 'Dropout')
+EarlyStopping = LazyAttribute('tensorflow.python.keras.callbacks', 'EarlyStopping')
+MinMaxScaler = LazyAttribute('sklearn.preprocessing', 'MinMaxScaler')
+TimeseriesGenerator = LazyAttribute('keras.preprocessing.sequence', 'TimeseriesGenerator')
+# Keras models of the monthly pulls and commits series
+keras_models = LazyModule('keras.models')
+keras_layers = LazyModule('keras.layers')
 
     
 
@@ -40,10 +57,17 @@ from google.cloud import storage
 app = Flask(__name__)
 # Handles CORS (cross-origin resource sharing)
 CORS(app)
-# Initlize Google cloud storage client
 
-def authenticate_implicit_with_adc(project_id="steel-ace-369218"):
-        client = storage.Client(project= project_id)
+# Hyper parameters of the models, part of the model registry and response cache keys
+# Look back decides how many days of data the issues model looks at for prediction
+FORECAST_HYPERPARAMETERS = {"look_back": 30, "units": 100, "dropout": 0.2, "epochs": 20, "batch_size": 70}
+# Model used for the monthly pulls and commits series
+SERIES_HYPERPARAMETERS = {"units": 200, "activation": "relu", "epochs": 20}
+# Model that forecasts the daily created issues, closed issues, pulls and commits together
+MULTI_SERIES_HYPERPARAMETERS = {"look_back": 30, "units": 100, "dropout": 0.2, "epochs": 20, "batch_size": 70}
+
+# The Google cloud storage client is created once per process by image_storage, see warm_up()
+
 # Add response headers to accept all types of  requests
 
 def build_preflight_response():
@@ -63,46 +87,72 @@ def build_actual_response(response):
     return response
 
 '''
-API route path is  "/api/forecast"
-This API will accept only POST request
+Runs once in the background after start up (see warmup.py): import the heavy packages, connect to the
+image storage and build and run the issues forecast model once, so the first request finds everything loaded
 '''
+def warm_up():
+    for module in [pd, mdates, keras_models, keras_layers, TimeseriesGenerator, MinMaxScaler]:
+        module.load()
+    charts.load()
+    image_storage.connect()
+    look_back = FORECAST_HYPERPARAMETERS["look_back"]
+    model = Sequential()
+    model.add(LSTM(FORECAST_HYPERPARAMETERS["units"], input_shape=(1, look_back)))
+    model.add(Dense(1))
+    model.compile(loss='mean_squared_error', optimizer='adam')
+    model.predict(np.zeros((1, 1, look_back), dtype='float32'))
 
-@app.route('/api/forecast', methods=['POST'])
-def forecast():
-    body = request.get_json()
-    issues = body["issues"]
-    type = body["type"]
-    repo_name = body["repo"]
-    data_frame = pd.DataFrame(issues)
-    df1 = data_frame.groupby([type], as_index=False).count()
-    df = df1[[type, 'issue_number']]
-    df.columns = ['ds', 'y']
+'''
+Numbers of the data only responses, rounded to keep the JSON small
+'''
+def compact(values, digits=4):
+    return [round(float(value), digits) for value in np.ravel(values)]
 
-    df['ds'] = df['ds'].astype('datetime64[ns]')
-    array = df.to_numpy()
-    x = np.array([time.mktime(i[0].timetuple()) for i in array])
-    y = np.array([i[1] for i in array])
+'''
+The created_at and closed_at date columns of a request body, either from the compact format
+({"daily": {"created_at": {"start": ..., "counts": [...]}, "closed_at": ...}}, see aggregation.daily_payload)
+or from the list of issues
+'''
+def issue_dates(body):
+    if "daily" in body:
+        return {column: aggregation.days_from_payload(body["daily"].get(column)) for column in ['created_at', 'closed_at']}
+    return aggregation.issue_table(body["issues"])
 
-    lzip = lambda *x: list(zip(*x))
+'''
+Forecast the created or closed issues of a repository
+body is the JSON body of the "/api/forecast" request, the returned dict is its JSON response
+"repo" is "owner/name" like for "/api/pulls", the trained models are registered under it
+The issues are either the list of issues ("issues") or their daily counts ("daily", see issue_dates())
+With "mode": "data" in the body the data behind the charts is returned instead of chart images
+'''
+def forecast_issues(body):
+    type = body["type"]
+    repo_name = body["repo"]
+    # The chart names only have the name of the repository
+    short_name = repo_name.split("/")[-1]
+    data_only = body.get("mode") == "data"
 
-    days = df.groupby('ds')['ds'].value_counts()
-    Y = df['y'].values
-    X = lzip(*days.index.values)[0]
-    firstDay = min(X)
+    # Monthly, day of week and month of year counts of created and closed issues
+    issues_summary = aggregation.summarize(issue_dates(body))
 
     '''
-    To achieve data consistancy with both actual data and predicted values, 
+    To achieve data consistancy with both actual data and predicted values,
     add zeros to dates that do not have orders
-    [firstDay + timedelta(days=day) for day in range((max(X) - firstDay).days + 1)]
     '''
-    Ys = [0, ]*((max(X) - firstDay).days + 1)
-    days = pd.Series([firstDay + timedelta(days=i)
-                      for i in range(len(Ys))])
-    for x, y in zip(X, Y):
-        Ys[(x - firstDay).days] = y
+    first_day, counts = issues_summary[type]['daily']
+    days = first_day + np.arange(len(counts))
+
+    # Return the cached response if this repository was forecasted from the same data before
+    cache_key = response_cache.cache_key(
+        'forecast', repo_name, {"type": type, "hyperparameters": FORECAST_HYPERPARAMETERS, "data_only": data_only,
+                                "base_image_path": image_storage.base_url()},
+        *[value for column in ['created_at', 'closed_at'] for value in issues_summary[column]['daily']])
+    cached_response = response_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
 
     # Modify the data that is suitable for LSTM
-    Ys = np.array(Ys)
+    Ys = np.array(counts)
     Ys = Ys.astype('float32')
     Ys = np.reshape(Ys, (-1, 1))
     # Apply min max scaler to transform the data
@@ -114,21 +164,14 @@ def forecast():
     train, test = Ys[0:train_size, :], Ys[train_size:len(Ys), :]
     print('train size:', len(train), ", test size:", len(test))
 
-    # Create the training and test dataset
-    def create_dataset(dataset, look_back=1):
-        X, Y = [], []
-        for i in range(len(dataset)-look_back-1):
-            a = dataset[i:(i+look_back), 0]
-            X.append(a)
-            Y.append(dataset[i + look_back, 0])
-        return np.array(X), np.array(Y)
     '''
     Look back decides how many days of data the model looks at for prediction
     Here LSTM looks at approximately one month data
     '''
-    look_back = 30
-    X_train, Y_train = create_dataset(train, look_back)
-    X_test, Y_test = create_dataset(test, look_back)
+    look_back = FORECAST_HYPERPARAMETERS["look_back"]
+    # Create the training and test dataset
+    X_train, Y_train = preprocessing.create_dataset(train, look_back)
+    X_test, Y_test = preprocessing.create_dataset(test, look_back)
 
     # Reshape input to be [samples, time steps, features]
     X_train = np.reshape(X_train, (X_train.shape[0], 1, X_train.shape[1]))
@@ -137,82 +180,92 @@ def forecast():
     # Verifying the shapes
     X_train.shape, X_test.shape, Y_train.shape, Y_test.shape
 
+    hyperparameters = FORECAST_HYPERPARAMETERS
+
     # Model to forecast
     model = Sequential()
-    model.add(LSTM(100, input_shape=(X_train.shape[1], X_train.shape[2])))
-    model.add(Dropout(0.2))
+    model.add(LSTM(hyperparameters["units"], input_shape=(X_train.shape[1], X_train.shape[2])))
+    model.add(Dropout(hyperparameters["dropout"]))
     model.add(Dense(1))
     model.compile(loss='mean_squared_error', optimizer='adam')
 
     # Fit the model with training data and set appropriate hyper parameters
-    history = model.fit(X_train, Y_train, epochs=20, batch_size=70, validation_data=(X_test, Y_test),
-                        callbacks=[EarlyStopping(monitor='val_loss', patience=10)], verbose=1, shuffle=False)
+    def fit(model, epochs):
+        history = model.fit(X_train, Y_train, epochs=epochs, batch_size=hyperparameters["batch_size"],
+                            validation_data=(X_test, Y_test),
+                            callbacks=[EarlyStopping(monitor='val_loss', patience=10)], verbose=1, shuffle=False)
+        return history.history
+
+    # Reuse the trained model if this data was seen before, or fine tune the latest one if it changed slightly
+    loss_history = model_registry.fit_with_registry(model, repo_name, type, hyperparameters,
+                                                    model_registry.fingerprint(days[0], counts), len(counts),
+                                                    scaler, fit)
+
+    # Predict issues for test data
+    y_pred = model.predict(X_test)
+
+    '''
+    Data only mode: return history, test predictions, loss curves and the aggregated counts as numbers
+    so the client can draw the charts itself, nothing is rendered or uploaded
+    '''
+    if data_only:
+        json_response = {
+            "mode": "data",
+            "type": type,
+            "loss": {"train": compact(loss_history['loss']), "test": compact(loss_history['val_loss'])},
+            "history": compact(Y_train),
+            "test": compact(Y_test),
+            "predictions": compact(y_pred),
+            "daily": {"start": str(days[0]), "counts": counts.tolist()},
+            "monthly": {column: issues_summary[column]['monthly'] for column in ['created_at', 'closed_at']},
+            "weekdays": {"labels": aggregation.WEEK_DAYS,
+                         "created_at": issues_summary['created_at']['weekdays'].tolist(),
+                         "closed_at": issues_summary['closed_at']['weekdays'].tolist()},
+            "months": {"labels": aggregation.MONTH_NAMES,
+                       "created_at": issues_summary['created_at']['months'].tolist(),
+                       "closed_at": issues_summary['closed_at']['months'].tolist()},
+        }
+        response_cache.put(cache_key, json_response)
+        return json_response
 
     '''
     Creating image URL
-    BASE_IMAGE_PATH refers to Google Cloud Storage Bucket URL.Add your Base Image Path in line 145
-    if you want to run the application local
-    LOCAL_IMAGE_PATH refers local directory where the figures generated by matplotlib are stored
-    These locally stored images will then be uploaded to Google Cloud Storage
+    The figures generated by matplotlib are rendered to memory (charts.png) and collected in images by chart name,
+    then stored together under the hash of their content (see image_storage.py), which gives their URLs
     '''
-    BASE_IMAGE_PATH = os.environ.get(
-        'BASE_IMAGE_PATH', 'Your_Base_Image_path')
-    # DO NOT DELETE "static/images" FOLDER as it is used to store figures/images generated by matplotlib
-    LOCAL_IMAGE_PATH = "static/images/"
+    images = {}
 
     # Creating the image path for model loss, LSTM generated image and all issues data image
-    MODEL_LOSS_IMAGE_NAME = "model_loss_" + type +"_"+ repo_name + ".png"
-    MODEL_LOSS_URL = BASE_IMAGE_PATH + MODEL_LOSS_IMAGE_NAME
+    MODEL_LOSS_IMAGE_NAME = "model_loss_" + type +"_"+ short_name + ".png"
 
-    LSTM_GENERATED_IMAGE_NAME = "lstm_generated_data_" + type +"_" + repo_name + ".png"
-    LSTM_GENERATED_URL = BASE_IMAGE_PATH + LSTM_GENERATED_IMAGE_NAME
+    LSTM_GENERATED_IMAGE_NAME = "lstm_generated_data_" + type +"_" + short_name + ".png"
 
-    ALL_ISSUES_DATA_IMAGE_NAME = "all_issues_data_" + type + "_"+ repo_name + ".png"
-    ALL_ISSUES_DATA_URL = BASE_IMAGE_PATH + ALL_ISSUES_DATA_IMAGE_NAME
-    
-    STACKED_BAR_CHART = "stacked_bar_chart" + type + "_"+ repo_name + ".png"
-    STACKED_BAR_CHART_URL = BASE_IMAGE_PATH + STACKED_BAR_CHART
+    ALL_ISSUES_DATA_IMAGE_NAME = "all_issues_data_" + type + "_"+ short_name + ".png"
     
-    WEEK_LINE_CHART = "week_line_chart" + type + "_"+ repo_name + ".png"
-    WEEK_LINE_CHART_URL = BASE_IMAGE_PATH + WEEK_LINE_CHART
+    STACKED_BAR_CHART = "stacked_bar_chart" + type + "_"+ short_name + ".png"
     
-    WEEK_LINE_CHART_CLOSED = "week_line_chart_closed" + type + "_"+ repo_name + ".png"
-    WEEK_LINE_CHART_CLOSED_URL = BASE_IMAGE_PATH + WEEK_LINE_CHART_CLOSED
+    WEEK_LINE_CHART = "week_line_chart" + type + "_"+ short_name + ".png"
     
-    MONTH_LINE_CHART_CLOSED = "month_line_chart_closed" + type + "_"+ repo_name + ".png"
-    MONTH_LINE_CHART_CLOSED_URL = BASE_IMAGE_PATH + MONTH_LINE_CHART_CLOSED
-
-    PULL_CHART = "pull_chart_"+ repo_name + ".png"
-    PULL_CHART_URL = BASE_IMAGE_PATH + PULL_CHART
-    
-    PULL_CHART_LOSS = "pull_chart_loss_"+ repo_name + ".png"
-    PULL_CHART_LOSS_URL = BASE_IMAGE_PATH + PULL_CHART_LOSS
+    WEEK_LINE_CHART_CLOSED = "week_line_chart_closed" + type + "_"+ short_name + ".png"
     
-    PULL_CHART_PREDICTIONS = "pull_chart_predictions_"+ repo_name + ".png"
-    PULL_CHART_PREDICTIONS_URL = BASE_IMAGE_PATH + PULL_CHART_PREDICTIONS
-
-    # Add your unique Bucket Name if you want to run it local
-    BUCKET_NAME = os.environ.get(
-        'BUCKET_NAME', 'Your_BUCKET_NAME')
+    MONTH_LINE_CHART_CLOSED = "month_line_chart_closed" + type + "_"+ short_name + ".png"
 
     # Model summary()
 
     # Plot the model loss image
-    plt.figure(figsize=(8, 4))
-    plt.plot(history.history['loss'], label='Train Loss')
-    plt.plot(history.history['val_loss'], label='Test Loss')
-    plt.title('Model Loss For ' + type)
-    plt.ylabel('Loss')
-    plt.xlabel('Epochs')
-    plt.legend(loc='upper right')
-    # Save the figure in /static/images folder
-    plt.savefig(LOCAL_IMAGE_PATH + MODEL_LOSS_IMAGE_NAME)
-
-    # Predict issues for test data
-    y_pred = model.predict(X_test)
+    fig = charts.figure(figsize=(8, 4))
+    axs = fig.subplots()
+    axs.plot(loss_history['loss'], label='Train Loss')
+    axs.plot(loss_history['val_loss'], label='Test Loss')
+    axs.set_title('Model Loss For ' + type)
+    axs.set_ylabel('Loss')
+    axs.set_xlabel('Epochs')
+    axs.legend(loc='upper right')
+    images[MODEL_LOSS_IMAGE_NAME] = charts.png(fig)
 
     # Plot the LSTM Generated image
-    fig, axs = plt.subplots(1, 1, figsize=(10, 4))
+    fig = charts.figure(figsize=(10, 4))
+    axs = fig.subplots()
     X = mdates.date2num(days)
     axs.plot(np.arange(0, len(Y_train)), Y_train, 'g', label="history")
     axs.plot(np.arange(len(Y_train), len(Y_train) + len(Y_test)),
@@ -223,11 +276,11 @@ def forecast():
     axs.set_title('LSTM Generated Data For ' + type)
     axs.set_xlabel('Time Steps')
     axs.set_ylabel('Issues')
-    # Save the figure in /static/images folder
-    plt.savefig(LOCAL_IMAGE_PATH + LSTM_GENERATED_IMAGE_NAME)
+    images[LSTM_GENERATED_IMAGE_NAME] = charts.png(fig)
 
     # Plot the All Issues data images
-    fig, axs = plt.subplots(1, 1, figsize=(10, 4))
+    fig = charts.figure(figsize=(10, 4))
+    axs = fig.subplots()
     X = mdates.date2num(days)
     axs.plot(X, Ys, 'purple', marker='.')
     locator = mdates.AutoDateLocator()
@@ -237,38 +290,14 @@ def forecast():
     axs.set_title('All Issues Data')
     axs.set_xlabel('Date')
     axs.set_ylabel('Issues')
-    # Save the figure in /static/images folder
-    plt.savefig(LOCAL_IMAGE_PATH + ALL_ISSUES_DATA_IMAGE_NAME)
-    
-    
-    created_at_issues = []
-    closed_at_issues = []
-    if not data_frame.empty:
-        created_at = data_frame['created_at']
-        month_issue_created = pd.to_datetime(
-            pd.Series(created_at), format='%Y/%m/%d')
-        month_issue_created.index = month_issue_created.dt.to_period('m')
-        month_issue_created = month_issue_created.groupby(level=0).size()
-        month_issue_created = month_issue_created.reindex(pd.period_range(
-            month_issue_created.index.min(), month_issue_created.index.max(), freq='m'), fill_value=0)
-        month_issue_created_dict = month_issue_created.to_dict()
-        for key in month_issue_created_dict.keys():
-            array = [str(key), month_issue_created_dict[key]]
-            created_at_issues.append(array)
-
-        closed_at = data_frame['closed_at'].sort_values(ascending=True)
-        month_issue_closed = pd.to_datetime(
-            pd.Series(closed_at), format='%Y/%m/%d')
-        month_issue_closed.index = month_issue_closed.dt.to_period('m')
-        month_issue_closed = month_issue_closed.groupby(level=0).size()
-        month_issue_closed = month_issue_closed.reindex(pd.period_range(
-            month_issue_closed.index.min(), month_issue_closed.index.max(), freq='m'), fill_value=0)
-        month_issue_closed_dict = month_issue_closed.to_dict()
-        for key in month_issue_closed_dict.keys():
-            array = [str(key), month_issue_closed_dict[key]]
-            closed_at_issues.append(array)
-
-    plt.figure(figsize=(12, 7))
+    images[ALL_ISSUES_DATA_IMAGE_NAME] = charts.png(fig)
+
+    # Monthly created and closed issues
+    created_at_issues = issues_summary['created_at']['monthly']
+    closed_at_issues = issues_summary['closed_at']['monthly']
+
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
     x = []
     arr_y1 = []
     for i in range(len(created_at_issues)):
@@ -277,166 +306,123 @@ def forecast():
     arr_y2 = []
     for i in range(len(closed_at_issues)):
         arr_y2.append(closed_at_issues[i][1])
-    plt.bar(x, arr_y1, color = 'blue')
-    plt.bar(x, arr_y2, bottom = arr_y1, color='yellow')
-    plt.legend(["Created Issues", "Closed Issues"])
-    plt.xticks(rotation=90)
-    plt.title('Stacked bar chart for to plot the created and closed issues for every Repository')
-    plt.savefig(LOCAL_IMAGE_PATH + STACKED_BAR_CHART)
-
-    x = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    data_frame['created_at'] = pd.to_datetime(data_frame['created_at'], errors='coerce')
-    week_df = data_frame.groupby(data_frame['created_at'].dt.day_name()).size()
-    week_df = pd.DataFrame({'Created_On':week_df.index, 'Count':week_df.values})
-    week_df = week_df.groupby(['Created_On']).sum().reindex(x)
-    max_issue_count = week_df.max()
-    max_issue_day = week_df['Count'].idxmax()
-    plt.figure(figsize=(12, 7))
-    plt.plot(week_df['Count'], label='Issues')
-    plt.title('Number of Issues Created for particular Week Days.')
-    plt.ylabel('Number of Issues')
-    plt.xlabel('Week Days')
-    plt.savefig(LOCAL_IMAGE_PATH + WEEK_LINE_CHART)
-    
-    data_frame['closed_at'] = pd.to_datetime(data_frame['closed_at'], errors='coerce')
-    week_df = data_frame.groupby(data_frame['closed_at'].dt.day_name()).size()
-    week_df = pd.DataFrame({'Closed_On':week_df.index, 'Count':week_df.values})
-    week_df = week_df.groupby(['Closed_On']).sum().reindex(x)
-    max_issue_count_closed = week_df.max()
-    max_issue_day_closed = week_df['Count'].idxmax()
-    plt.figure(figsize=(12, 7))
-    plt.plot(week_df['Count'], label='Issues')
-    plt.title('Number of Issues Closed for particular Week Days.')
-    plt.ylabel('Number of Issues')
-    plt.xlabel('Week Days')
-    plt.savefig(LOCAL_IMAGE_PATH + WEEK_LINE_CHART_CLOSED)
-    
-    x = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-    data_frame['closed_at'] = pd.to_datetime(data_frame['closed_at'], errors='coerce')
-    month_df = data_frame.groupby(data_frame['closed_at'].dt.month_name()).size()
-    month_df = pd.DataFrame({'Closed_On':month_df.index, 'Count':month_df.values})
-    month_df = month_df.groupby(['Closed_On']).sum().reindex(x)
-    max_issue_count_closed_month = month_df.max()
-    max_issue_closed_month = month_df['Count'].idxmax()
-    plt.figure(figsize=(12, 7))
-    plt.plot(month_df['Count'], label='Issues')
-    plt.title('Number of Issues Closed for particular Month.')
-    plt.ylabel('Number of Issues')
-    plt.xlabel('Month Names')
-    plt.savefig(LOCAL_IMAGE_PATH + MONTH_LINE_CHART_CLOSED)
-
-    # Uploads an images into the google cloud storage bucket
-    bucket = client.get_bucket(BUCKET_NAME)
-    new_blob = bucket.blob(MODEL_LOSS_IMAGE_NAME)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + MODEL_LOSS_IMAGE_NAME)
-    new_blob = bucket.blob(ALL_ISSUES_DATA_IMAGE_NAME)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + ALL_ISSUES_DATA_IMAGE_NAME)
-    new_blob = bucket.blob(LSTM_GENERATED_IMAGE_NAME)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + LSTM_GENERATED_IMAGE_NAME)
-    new_blob = bucket.blob(STACKED_BAR_CHART)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + STACKED_BAR_CHART)
-    new_blob = bucket.blob(WEEK_LINE_CHART)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + WEEK_LINE_CHART)
-    new_blob = bucket.blob(WEEK_LINE_CHART_CLOSED)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + WEEK_LINE_CHART_CLOSED)
-    new_blob = bucket.blob(MONTH_LINE_CHART_CLOSED)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + MONTH_LINE_CHART_CLOSED)
-    bucket = client.get_bucket(BUCKET_NAME)
-    new_blob = bucket.blob(PULL_CHART)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + PULL_CHART)
-    new_blob = bucket.blob(PULL_CHART_LOSS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + PULL_CHART_LOSS)
-    new_blob = bucket.blob(PULL_CHART_PREDICTIONS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + PULL_CHART_PREDICTIONS)
+    axs.bar(x, arr_y1, color = 'blue')
+    axs.bar(x, arr_y2, bottom = arr_y1, color='yellow')
+    axs.legend(["Created Issues", "Closed Issues"])
+    axs.tick_params(axis='x', labelrotation=90)
+    axs.set_title('Stacked bar chart for to plot the created and closed issues for every Repository')
+    images[STACKED_BAR_CHART] = charts.png(fig)
+
+    week_counts = issues_summary['created_at']['weekdays']
+    max_issue_count = int(week_counts.max())
+    max_issue_day = aggregation.WEEK_DAYS[week_counts.argmax()]
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.plot(aggregation.WEEK_DAYS, week_counts, label='Issues')
+    axs.set_title('Number of Issues Created for particular Week Days.')
+    axs.set_ylabel('Number of Issues')
+    axs.set_xlabel('Week Days')
+    images[WEEK_LINE_CHART] = charts.png(fig)
+
+    week_counts = issues_summary['closed_at']['weekdays']
+    max_issue_count_closed = int(week_counts.max())
+    max_issue_day_closed = aggregation.WEEK_DAYS[week_counts.argmax()]
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.plot(aggregation.WEEK_DAYS, week_counts, label='Issues')
+    axs.set_title('Number of Issues Closed for particular Week Days.')
+    axs.set_ylabel('Number of Issues')
+    axs.set_xlabel('Week Days')
+    images[WEEK_LINE_CHART_CLOSED] = charts.png(fig)
+
+    month_counts = issues_summary['closed_at']['months']
+    max_issue_count_closed_month = int(month_counts.max())
+    max_issue_closed_month = aggregation.MONTH_NAMES[month_counts.argmax()]
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.plot(aggregation.MONTH_NAMES, month_counts, label='Issues')
+    axs.set_title('Number of Issues Closed for particular Month.')
+    axs.set_ylabel('Number of Issues')
+    axs.set_xlabel('Month Names')
+    images[MONTH_LINE_CHART_CLOSED] = charts.png(fig)
+
+    # Upload all images of this request at once, straight from memory
+    urls = image_storage.upload_all(images)
 
     # Construct the response
     json_response = {
-        "model_loss_image_url": MODEL_LOSS_URL,
-        "lstm_generated_image_url": LSTM_GENERATED_URL,
-        "all_issues_data_image": ALL_ISSUES_DATA_URL,
-        "stacked_bar_chart": STACKED_BAR_CHART_URL,
-        "week_line_chart": WEEK_LINE_CHART_URL,
+        "model_loss_image_url": urls[MODEL_LOSS_IMAGE_NAME],
+        "lstm_generated_image_url": urls[LSTM_GENERATED_IMAGE_NAME],
+        "all_issues_data_image": urls[ALL_ISSUES_DATA_IMAGE_NAME],
+        "stacked_bar_chart": urls[STACKED_BAR_CHART],
+        "week_line_chart": urls[WEEK_LINE_CHART],
         "week_line_chart1": max_issue_day,
         "week_line_chart2": str(max_issue_count),
-        "week_line_chart_closed": WEEK_LINE_CHART_CLOSED_URL,
+        "week_line_chart_closed": urls[WEEK_LINE_CHART_CLOSED],
         "week_line_chart_closed1": max_issue_day_closed,
         "week_line_chart_closed2": str(max_issue_count_closed),
-        "month_line_chart_closed": MONTH_LINE_CHART_CLOSED_URL,
+        "month_line_chart_closed": urls[MONTH_LINE_CHART_CLOSED],
         "month_line_chart_closed1": max_issue_closed_month,
         "month_line_chart_closed2": str(max_issue_count_closed_month),
-        "pull_chart": PULL_CHART_URL,
-        "pull_chart_loss": PULL_CHART_LOSS_URL,
-        "pull_chart_predictions": PULL_CHART_PREDICTIONS_URL,
     }
+    response_cache.put(cache_key, json_response)
     # Returns image url back to flask microservice
-    return jsonify(json_response)
+    return json_response
 
-@app.route('/api/pulls', methods=['POST'])
-def pulls():
-    from keras.models import Sequential
-    from keras.layers import Dense
-    from keras.layers import LSTM
-
-    body = request.get_json()
-    data = body["pulls"]
+'''
+Forecast the monthly pulls of a repository
+body is the JSON body of the "/api/pulls" request, the returned dict is its JSON response
+The pulls are either the list of pulls ("pulls") or their daily counts ({"daily": {"pulls": ...}})
+With "mode": "data" in the body the data behind the charts is returned instead of chart images
+'''
+def forecast_pulls(body):
     repo_name = body["repo"]
+    data_only = body.get("mode") == "data"
 
-    BASE_IMAGE_PATH = os.environ.get(
-        'BASE_IMAGE_PATH', 'Your_Base_Image_path')
-    # DO NOT DELETE "static/images" FOLDER as it is used to store figures/images generated by matplotlib
-    LOCAL_IMAGE_PATH = "static/images/"
+    # Images rendered by this request, uploaded together at the end
+    images = {}
     PULL_CHART = "pull_chart_"+ repo_name.split("/")[1] + ".png"
-    PULL_CHART_URL = BASE_IMAGE_PATH + PULL_CHART
     
     PULL_CHART_LOSS = "pull_chart_loss_"+ repo_name.split("/")[1] + ".png"
-    PULL_CHART_LOSS_URL = BASE_IMAGE_PATH + PULL_CHART_LOSS
     
     PULL_CHART_PREDICTIONS = "pull_chart_predictions_"+ repo_name.split("/")[1] + ".png"
-    PULL_CHART_PREDICTIONS_URL = BASE_IMAGE_PATH + PULL_CHART_PREDICTIONS
-
 
     COMMIT_CHART = "commit_chart_"+ repo_name.split("/")[1] + ".png"
-    COMMIT_CHART_URL = BASE_IMAGE_PATH + COMMIT_CHART
     
     COMMIT_CHART_LOSS = "commit_chart_loss_"+ repo_name.split("/")[1] + ".png"
-    COMMIT_CHART_LOSS_URL = BASE_IMAGE_PATH + COMMIT_CHART_LOSS
     
     COMMIT_CHART_PREDICTIONS = "commit_chart_predictions_"+ repo_name.split("/")[1] + ".png"
-    COMMIT_CHART_PREDICTIONS_URL = BASE_IMAGE_PATH + COMMIT_CHART_PREDICTIONS
 
-    # Add your unique Bucket Name if you want to run it local
-    BUCKET_NAME = os.environ.get(
-        'BUCKET_NAME', 'Your_BUCKET_NAME')
+    # The commit charts are drawn by "/api/commits", the newest ones it published are looked up for every request
+    # (not cached with the response) so they change as soon as the commits are forecasted again
+    def with_commit_charts(json_response):
+        urls = image_storage.published_urls([COMMIT_CHART, COMMIT_CHART_LOSS, COMMIT_CHART_PREDICTIONS])
+        return dict(json_response,
+                    commit_chart=urls[COMMIT_CHART],
+                    commit_chart_loss=urls[COMMIT_CHART_LOSS],
+                    commit_chart_predictions=urls[COMMIT_CHART_PREDICTIONS])
 
     df = pd.DataFrame()
-    arr = []
-    for i in range(len(data)):
-        arr.append(data[i]['created_at'])
-    df['Created_At'] = arr
-    df['Created_At'] = pd.to_datetime(df['Created_At'], errors='coerce')
+    # Creation dates of the pulls, from their daily counts in the compact format or from the list of pulls
+    if "daily" in body:
+        df['Created_At'] = aggregation.days_from_payload(body["daily"].get("pulls"))
+    else:
+        df['Created_At'] = pd.to_datetime([pull['created_at'] for pull in body["pulls"]], errors='coerce')
     df['Count'] = 1
     df['Created_At'] = df['Created_At'].dt.to_period('M')
     df = df.groupby('Created_At').sum()
-    
-    df1 = df.copy()
-    df1.index = pd.to_datetime(df1.index.to_timestamp())
-    plt.figure(figsize=(12, 7))
-    plt.plot(df1)
-    plt.title('Number of Pulls Created for particular Month.')
-    plt.ylabel('Number of Pulls')
-    plt.xlabel('Time')
-    plt.savefig(LOCAL_IMAGE_PATH + PULL_CHART)
-    
+
+    # Return the cached response if this repository was forecasted from the same data before
+    # Months to forecast, by default as many as the test data has
+    horizon = int(body.get("horizon", int(len(df)/2)))
+    cache_key = response_cache.cache_key(
+        'pulls', repo_name, {"hyperparameters": SERIES_HYPERPARAMETERS, "horizon": horizon, "data_only": data_only,
+                           "base_image_path": image_storage.base_url()},
+        str(df.index[0]), df['Count'].values)
+    cached_response = response_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response if data_only else with_commit_charts(cached_response)
+
     train_data = df[:len(df)-int(len(df)/2)]
     test_data = df[len(df)-int(len(df)/2):]
     scaler = MinMaxScaler()
@@ -446,94 +432,90 @@ def pulls():
     n_input = int(len(df)/2)
     n_features= 1
     generator = TimeseriesGenerator(scaled_train_data, scaled_train_data, length=n_input-1, batch_size=1)
-    lstm_model = Sequential()
-    lstm_model.add(LSTM(200, activation='relu', input_shape=(n_input, n_features)))
-    lstm_model.add(Dense(1))
+    hyperparameters = SERIES_HYPERPARAMETERS
+    lstm_model = keras_models.Sequential()
+    lstm_model.add(keras_layers.LSTM(hyperparameters["units"], activation=hyperparameters["activation"], input_shape=(n_input, n_features)))
+    lstm_model.add(keras_layers.Dense(1))
     lstm_model.compile(optimizer='adam', loss='mse')
-    lstm_model.fit_generator(generator,epochs=20)
-
-    losses_lstm = lstm_model.history.history['loss']
-    plt.figure(figsize=(12, 7))
-    plt.xlabel("Epochs")
-    plt.ylabel("Loss")
-    plt.xticks(np.arange(0,21,1))
-    plt.plot(range(len(losses_lstm)),losses_lstm)
-    plt.savefig(LOCAL_IMAGE_PATH + PULL_CHART_LOSS)
-
-    lstm_predictions_scaled = list()
-    batch = scaled_train_data[-n_input:]
-    current_batch = batch.reshape((1, n_input, n_features))
-    for i in range(len(test_data)):   
-        lstm_pred = lstm_model.predict(current_batch)[0]
-        lstm_predictions_scaled.append(lstm_pred) 
-        current_batch = np.append(current_batch[:,1:,:],[[lstm_pred]],axis=1)
-    lstm_predictions = scaler.inverse_transform(lstm_predictions_scaled)
-    test_data['LSTM_Predictions'] = lstm_predictions
+
+    def fit(model, epochs):
+        model.fit_generator(generator,epochs=epochs)
+        return model.history.history
+
+    # Reuse the trained model if this data was seen before, or fine tune the latest one if it changed slightly
+    losses_lstm = model_registry.fit_with_registry(lstm_model, repo_name, 'pulls', hyperparameters,
+                                                   model_registry.fingerprint(str(df.index[0]), df['Count'].values),
+                                                   len(df), scaler, fit)['loss']
+
+    # Forecast the whole horizon in one call, each prediction is fed back as the newest month
+    lstm_predictions_scaled = rollout.rollout(lstm_model, scaled_train_data[-n_input:], horizon)
+    lstm_predictions = pd.Series(scaler.inverse_transform(lstm_predictions_scaled)[:, 0],
+                                 index=pd.period_range(test_data.index[0], periods=horizon, freq='M').to_timestamp())
+
+    # Data only mode: the monthly counts, loss curve and forecast as numbers, nothing is rendered or uploaded
+    if data_only:
+        json_response = {
+            "mode": "data",
+            "months": [str(month) for month in df.index],
+            "counts": df['Count'].tolist(),
+            "loss": compact(losses_lstm),
+            "prediction_months": [str(month) for month in lstm_predictions.index.to_period('M')],
+            "predictions": compact(lstm_predictions.values, 2),
+        }
+        response_cache.put(cache_key, json_response)
+        return json_response
+
+    df1 = df.copy()
+    df1.index = pd.to_datetime(df1.index.to_timestamp())
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.plot(df1)
+    axs.set_title('Number of Pulls Created for particular Month.')
+    axs.set_ylabel('Number of Pulls')
+    axs.set_xlabel('Time')
+    images[PULL_CHART] = charts.png(fig)
+
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.set_xlabel("Epochs")
+    axs.set_ylabel("Loss")
+    axs.set_xticks(np.arange(0,21,1))
+    axs.plot(range(len(losses_lstm)),losses_lstm)
+    images[PULL_CHART_LOSS] = charts.png(fig)
 
     test_data.index = pd.to_datetime(test_data.index.to_timestamp())
-    plt.figure(figsize=(12, 7))
-    plt.plot(test_data['Count'])
-    plt.plot(test_data['LSTM_Predictions'])
-    plt.savefig(LOCAL_IMAGE_PATH + PULL_CHART_PREDICTIONS)
-
-    bucket = client.get_bucket(BUCKET_NAME)
-    new_blob = bucket.blob(PULL_CHART)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + PULL_CHART)
-    new_blob = bucket.blob(PULL_CHART_LOSS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + PULL_CHART_LOSS)
-    new_blob = bucket.blob(PULL_CHART_PREDICTIONS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + PULL_CHART_PREDICTIONS)
-    
-    new_blob = bucket.blob(COMMIT_CHART)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + COMMIT_CHART)
-    new_blob = bucket.blob(COMMIT_CHART_LOSS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + COMMIT_CHART_LOSS)
-    new_blob = bucket.blob(COMMIT_CHART_PREDICTIONS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + COMMIT_CHART_PREDICTIONS)
-    
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.plot(test_data['Count'])
+    axs.plot(lstm_predictions)
+    images[PULL_CHART_PREDICTIONS] = charts.png(fig)
+
+    urls = image_storage.upload_all(images)
+
     json_response = {
-        "pull_chart": PULL_CHART_URL,
-        "pull_chart_loss": PULL_CHART_LOSS_URL,
-        "pull_chart_predictions": PULL_CHART_PREDICTIONS_URL,
-        "commit_chart": COMMIT_CHART_URL,
-        "commit_chart_loss": COMMIT_CHART_LOSS_URL,
-        "commit_chart_predictions": COMMIT_CHART_PREDICTIONS_URL,
+        "pull_chart": urls[PULL_CHART],
+        "pull_chart_loss": urls[PULL_CHART_LOSS],
+        "pull_chart_predictions": urls[PULL_CHART_PREDICTIONS],
     }
+    response_cache.put(cache_key, json_response)
     # Returns image url back to flask microservice
-    return jsonify(json_response)
+    return with_commit_charts(json_response)
 
-@app.route('/api/commits', methods=['POST'])
-def commits():
-    from keras.models import Sequential
-    from keras.layers import Dense
-    from keras.layers import LSTM
-
-    body = request.get_json()
+'''
+Forecast the monthly commits of a repository
+body is the JSON body of the "/api/commits" request, the returned dict is its JSON response
+'''
+def forecast_commits(body):
     data = body["commits"]
     repo_name = body["repo"]
 
-    BASE_IMAGE_PATH = os.environ.get(
-        'BASE_IMAGE_PATH', 'Your_Base_Image_path')
-    # DO NOT DELETE "static/images" FOLDER as it is used to store figures/images generated by matplotlib
-    LOCAL_IMAGE_PATH = "static/images/"
+    # Images rendered by this request, uploaded together at the end
+    images = {}
     COMMIT_CHART = "commit_chart_"+ repo_name.split("/")[1] + ".png"
-    COMMIT_CHART_URL = BASE_IMAGE_PATH + COMMIT_CHART
     
     COMMIT_CHART_LOSS = "commit_chart_loss_"+ repo_name.split("/")[1] + ".png"
-    COMMIT_CHART_LOSS_URL = BASE_IMAGE_PATH + COMMIT_CHART_LOSS
     
     COMMIT_CHART_PREDICTIONS = "commit_chart_predictions_"+ repo_name.split("/")[1] + ".png"
-    COMMIT_CHART_PREDICTIONS_URL = BASE_IMAGE_PATH + COMMIT_CHART_PREDICTIONS
-
-    # Add your unique Bucket Name if you want to run it local
-    BUCKET_NAME = os.environ.get(
-        'BUCKET_NAME', 'Your_BUCKET_NAME')
 
     # df = pd.DataFrame(data)
     # df = df[['created_at']]
@@ -552,15 +534,27 @@ def commits():
     df['Count'] = 1
     df['Created_At'] = df['Created_At'].dt.to_period('M')
     df = df.groupby('Created_At').sum()
-    
+
+    # Return the cached response if this repository was forecasted from the same data before
+    # Months to forecast, by default as many as the test data has
+    horizon = int(body.get("horizon", int(len(df)/2)))
+    cache_key = response_cache.cache_key(
+        'commits', repo_name, {"hyperparameters": SERIES_HYPERPARAMETERS, "horizon": horizon,
+                           "base_image_path": image_storage.base_url()},
+        str(df.index[0]), df['Count'].values)
+    cached_response = response_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+
     df1 = df.copy()
     df1.index = pd.to_datetime(df1.index.to_timestamp())
-    plt.figure(figsize=(12, 7))
-    plt.plot(df1)
-    plt.title('Number of Commits Created for particular Month.')
-    plt.ylabel('Number of Commits')
-    plt.xlabel('Time')
-    plt.savefig(LOCAL_IMAGE_PATH + COMMIT_CHART)
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.plot(df1)
+    axs.set_title('Number of Commits Created for particular Month.')
+    axs.set_ylabel('Number of Commits')
+    axs.set_xlabel('Time')
+    images[COMMIT_CHART] = charts.png(fig)
     
     train_data = df[:len(df)-int(len(df)/2)]
     test_data = df[len(df)-int(len(df)/2):]
@@ -571,55 +565,259 @@ def commits():
     n_input = int(len(df)/2)
     n_features= 1
     generator = TimeseriesGenerator(scaled_train_data, scaled_train_data, length=n_input-1, batch_size=1)
-    lstm_model = Sequential()
-    lstm_model.add(LSTM(200, activation='relu', input_shape=(n_input, n_features)))
-    lstm_model.add(Dense(1))
+    hyperparameters = SERIES_HYPERPARAMETERS
+    lstm_model = keras_models.Sequential()
+    lstm_model.add(keras_layers.LSTM(hyperparameters["units"], activation=hyperparameters["activation"], input_shape=(n_input, n_features)))
+    lstm_model.add(keras_layers.Dense(1))
     lstm_model.compile(optimizer='adam', loss='mse')
-    lstm_model.fit_generator(generator,epochs=20)
-
-    losses_lstm = lstm_model.history.history['loss']
-    plt.figure(figsize=(12, 7))
-    plt.xlabel("Epochs")
-    plt.ylabel("Loss")
-    plt.xticks(np.arange(0,21,1))
-    plt.plot(range(len(losses_lstm)),losses_lstm)
-    plt.savefig(LOCAL_IMAGE_PATH + COMMIT_CHART_LOSS)
-
-    lstm_predictions_scaled = list()
-    batch = scaled_train_data[-n_input:]
-    current_batch = batch.reshape((1, n_input, n_features))
-    for i in range(len(test_data)):   
-        lstm_pred = lstm_model.predict(current_batch)[0]
-        lstm_predictions_scaled.append(lstm_pred) 
-        current_batch = np.append(current_batch[:,1:,:],[[lstm_pred]],axis=1)
-    lstm_predictions = scaler.inverse_transform(lstm_predictions_scaled)
-    test_data['LSTM_Predictions'] = lstm_predictions
+
+    def fit(model, epochs):
+        model.fit_generator(generator,epochs=epochs)
+        return model.history.history
+
+    # Reuse the trained model if this data was seen before, or fine tune the latest one if it changed slightly
+    losses_lstm = model_registry.fit_with_registry(lstm_model, repo_name, 'commits', hyperparameters,
+                                                   model_registry.fingerprint(str(df.index[0]), df['Count'].values),
+                                                   len(df), scaler, fit)['loss']
+
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.set_xlabel("Epochs")
+    axs.set_ylabel("Loss")
+    axs.set_xticks(np.arange(0,21,1))
+    axs.plot(range(len(losses_lstm)),losses_lstm)
+    images[COMMIT_CHART_LOSS] = charts.png(fig)
+
+    # Forecast the whole horizon in one call, each prediction is fed back as the newest month
+    lstm_predictions_scaled = rollout.rollout(lstm_model, scaled_train_data[-n_input:], horizon)
+    lstm_predictions = pd.Series(scaler.inverse_transform(lstm_predictions_scaled)[:, 0],
+                                 index=pd.period_range(test_data.index[0], periods=horizon, freq='M').to_timestamp())
 
     test_data.index = pd.to_datetime(test_data.index.to_timestamp())
-    plt.figure(figsize=(12, 7))
-    plt.plot(test_data['Count'])
-    plt.plot(test_data['LSTM_Predictions'])
-    plt.savefig(LOCAL_IMAGE_PATH + COMMIT_CHART_PREDICTIONS)
-
-    bucket = client.get_bucket(BUCKET_NAME)
-    new_blob = bucket.blob(COMMIT_CHART)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + COMMIT_CHART)
-    new_blob = bucket.blob(COMMIT_CHART_LOSS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + COMMIT_CHART_LOSS)
-    new_blob = bucket.blob(COMMIT_CHART_PREDICTIONS)
-    new_blob.upload_from_filename(
-        filename=LOCAL_IMAGE_PATH + COMMIT_CHART_PREDICTIONS)
-    
+    fig = charts.figure(figsize=(12, 7))
+    axs = fig.subplots()
+    axs.plot(test_data['Count'])
+    axs.plot(lstm_predictions)
+    images[COMMIT_CHART_PREDICTIONS] = charts.png(fig)
+
+    # Published for the commit charts of "/api/pulls"
+    urls = image_storage.upload_all(images, publish_charts=True)
+
     json_response = {
-        "commit_chart": COMMIT_CHART_URL,
-        "commit_chart_loss": COMMIT_CHART_LOSS_URL,
-        "commit_chart_predictions": COMMIT_CHART_PREDICTIONS_URL,
+        "commit_chart": urls[COMMIT_CHART],
+        "commit_chart_loss": urls[COMMIT_CHART_LOSS],
+        "commit_chart_predictions": urls[COMMIT_CHART_PREDICTIONS],
     }
+    response_cache.put(cache_key, json_response)
     # Returns image url back to flask microservice
-    return jsonify(json_response)
+    return json_response
+
+'''
+Forecast several issue types ("types", by default created_at and closed_at) from one request in the compact
+format, the response has the "/api/forecast" response of every type
+'''
+def forecast_issue_types(body):
+    return {type: forecast_issues(dict(body, type=type)) for type in body.get("types", ['created_at', 'closed_at'])}
+
+'''
+Forecast the created issues, closed issues, pulls and commits of a repository at once
+The daily series are aligned on the same days and stacked as the features of one LSTM, so a single
+fit replaces the separate fits of "/api/forecast" (twice), "/api/pulls" and "/api/commits"
+body: {"repo": ..., "issues": [...], "pulls": [...], "commits": [...]}, commits are optional
+or in the compact format {"repo": ..., "daily": {"created_at": ..., "closed_at": ..., "pulls": ..., "commits": ...}}
+with the daily counts of every series (see aggregation.daily_payload)
+It only returns the loss and the generated data of every series, the dashboard of the Flask microservice shows the
+charts of "/api/forecast" and "/api/pulls" (stacked bars, week days, pull requests) and keeps using those
+'''
+def forecast_all(body):
+    repo_name = body["repo"]
+
+    columns = issue_dates(body)
+    if "daily" in body:
+        columns["pulls"] = aggregation.days_from_payload(body["daily"].get("pulls"))
+        if body["daily"].get("commits"):
+            columns["commits"] = aggregation.days_from_payload(body["daily"]["commits"])
+    else:
+        columns["pulls"] = aggregation.to_days([pull['created_at'] for pull in body.get("pulls", [])])
+        if body.get("commits"):
+            columns["commits"] = aggregation.to_days([commit['commit']['committer']['date'] for commit in body["commits"]])
+    series_names = list(columns)
+    days, counts = preprocessing.aligned_daily_series(columns)
+
+    hyperparameters = MULTI_SERIES_HYPERPARAMETERS
+    cache_key = response_cache.cache_key(
+        'all', repo_name, {"series": series_names, "hyperparameters": hyperparameters,
+                           "base_image_path": image_storage.base_url()},
+        days[0], counts)
+    cached_response = response_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    # Every series is scaled on its own, MinMaxScaler scales each column separately
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    Ys = scaler.fit_transform(counts.astype('float32'))
+    # Divide training - test data with 80-20 split
+    train_size = int(len(Ys) * 0.80)
+    train, test = Ys[0:train_size, :], Ys[train_size:len(Ys), :]
+
+    # [samples, time steps, features] with one feature per series
+    look_back = hyperparameters["look_back"]
+    X_train, Y_train = preprocessing.create_multi_dataset(train, look_back)
+    X_test, Y_test = preprocessing.create_multi_dataset(test, look_back)
+
+    model = Sequential()
+    model.add(LSTM(hyperparameters["units"], input_shape=(look_back, len(series_names))))
+    model.add(Dropout(hyperparameters["dropout"]))
+    model.add(Dense(len(series_names)))
+    model.compile(loss='mean_squared_error', optimizer='adam')
+
+    def fit(model, epochs):
+        history = model.fit(X_train, Y_train, epochs=epochs, batch_size=hyperparameters["batch_size"],
+                            validation_data=(X_test, Y_test),
+                            callbacks=[EarlyStopping(monitor='val_loss', patience=10)], verbose=1, shuffle=False)
+        return history.history
+
+    loss_history = model_registry.fit_with_registry(model, repo_name, '+'.join(series_names), hyperparameters,
+                                                    model_registry.fingerprint(days[0], counts), len(counts),
+                                                    scaler, fit)
+
+    # One prediction pass gives the test forecast of every series
+    y_pred = model.predict(X_test)
+
+    # Images rendered by this request, uploaded together at the end
+    images = {}
+
+    MODEL_LOSS_IMAGE_NAME = "model_loss_all_" + repo_name.split("/")[1] + ".png"
+    fig = charts.figure(figsize=(8, 4))
+    axs = fig.subplots()
+    axs.plot(loss_history['loss'], label='Train Loss')
+    axs.plot(loss_history['val_loss'], label='Test Loss')
+    axs.set_title('Model Loss For All Series')
+    axs.set_ylabel('Loss')
+    axs.set_xlabel('Epochs')
+    axs.legend(loc='upper right')
+    images[MODEL_LOSS_IMAGE_NAME] = charts.png(fig)
+
+    series_images = {}
+    for index, name in enumerate(series_names):
+        LSTM_GENERATED_IMAGE_NAME = "lstm_generated_data_all_" + name + "_" + repo_name.split("/")[1] + ".png"
+        fig = charts.figure(figsize=(10, 4))
+        axs = fig.subplots()
+        axs.plot(np.arange(0, len(Y_train)), Y_train[:, index], 'g', label="history")
+        axs.plot(np.arange(len(Y_train), len(Y_train) + len(Y_test)),
+                 Y_test[:, index], marker='.', label="true")
+        axs.plot(np.arange(len(Y_train), len(Y_train) + len(Y_test)),
+                 y_pred[:, index], 'r', label="prediction")
+        axs.legend()
+        axs.set_title('LSTM Generated Data For ' + name)
+        axs.set_xlabel('Time Steps')
+        axs.set_ylabel('Count')
+        images[LSTM_GENERATED_IMAGE_NAME] = charts.png(fig)
+        series_images[name] = LSTM_GENERATED_IMAGE_NAME
+
+    urls = image_storage.upload_all(images)
+
+    series_response = {}
+    for index, name in enumerate(series_names):
+        series_response[name] = {
+            "lstm_generated_image_url": urls[series_images[name]],
+            "val_loss": float(np.mean((y_pred[:, index] - Y_test[:, index]) ** 2)) if len(Y_test) else None,
+        }
+    json_response = {
+        "model_loss_image_url": urls[MODEL_LOSS_IMAGE_NAME],
+        "first_day": str(days[0]),
+        "series": series_response,
+    }
+    response_cache.put(cache_key, json_response)
+    return json_response
+
+'''
+API route path is  "/api/forecast"
+This API will accept only POST request
+"/api/forecast" and "/api/pulls" return the chart data instead of chart images when the body has "mode": "data"
+'''
+@app.route('/api/forecast', methods=['POST'])
+def forecast():
+    return jsonify(forecast_issues(request.get_json()))
+
+@app.route('/api/pulls', methods=['POST'])
+def pulls():
+    return jsonify(forecast_pulls(request.get_json()))
+
+@app.route('/api/commits', methods=['POST'])
+def commits():
+    return jsonify(forecast_commits(request.get_json()))
+
+'''
+API route path is  "/api/forecast/daily"
+Forecasts the created and closed issues from one compact request, see forecast_issue_types()
+'''
+@app.route('/api/forecast/daily', methods=['POST'])
+def forecast_daily():
+    return jsonify(forecast_issue_types(request.get_json()))
+
+'''
+API route path is  "/api/forecast/all"
+Forecasts every series of a repository with one model, see forecast_all()
+'''
+@app.route('/api/forecast/all', methods=['POST'])
+def forecast_every_series():
+    return jsonify(forecast_all(request.get_json()))
+
+'''
+API route path is  "/api/jobs/<kind>"
+Queue a "forecast", "pulls", "commits", "all" or "daily" ("/api/forecast/daily") request (same body as its own API)
+and return the job id at once
+'''
+@app.route('/api/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    if kind not in jobs.JOB_KINDS:
+        error = {"error": "Unknown job kind " + kind}
+        resp = Response(json.dumps(error), mimetype='application/json')
+        resp.status_code = 404
+        return resp
+    job_id = jobs.submit(kind, request.get_json())
+    response = jsonify({"job_id": job_id, "status_url": "/api/jobs/" + job_id})
+    response.status_code = 202
+    return response
+
+'''
+API route path is  "/api/jobs/<job_id>"
+Returns the status of a job ("queued", "running", "done" or "failed") and its result once done
+'''
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.status(job_id)
+    if job is None:
+        error = {"error": "Job Not Found"}
+        resp = Response(json.dumps(error), mimetype='application/json')
+        resp.status_code = 404
+        return resp
+    return jsonify(job)
+
+'''
+API route path is  "/healthz"
+Readiness check: 503 while the service is still warming up, 200 once the models can be served without delay
+'''
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    state = warmup.status()
+    response = jsonify(state)
+    response.status_code = 200 if state["status"] == "ready" else 503
+    return response
+
+'''
+API route path is  "/metrics"
+Upload and existence check latencies of the image storage
+'''
+@app.route('/metrics', methods=['GET'])
+def service_metrics():
+    return jsonify({"storage": image_storage.metrics()})
 
 # Run LSTM app server on port 8080
 if __name__ == '__main__':
+    # Resume unfinished jobs and warm up. With the debug reloader only the serving child process does this
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        jobs.start()
+        warmup.start(warm_up, 8080)
     app.run(debug=True, host='0.0.0.0', port=8080)
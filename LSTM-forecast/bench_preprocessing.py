@@ -0,0 +1,100 @@
+'''
+Benchmark of the forecast() preprocessing: the original pandas/loop path against preprocessing.py.
+Both paths run on the same synthetic multi-year issue list and their outputs are checked to be identical.
+Run it from the LSTM-forecast folder:
+    python bench_preprocessing.py --years 5 --issues 50000
+'''
+import argparse
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import preprocessing
+
+
+def legacy_daily_series(issues, type):
+    data_frame = pd.DataFrame(issues)
+    df1 = data_frame.groupby([type], as_index=False).count()
+    df = df1[[type, 'issue_number']]
+    df.columns = ['ds', 'y']
+    df['ds'] = df['ds'].astype('datetime64[ns]')
+    lzip = lambda *x: list(zip(*x))
+    days = df.groupby('ds')['ds'].value_counts()
+    Y = df['y'].values
+    X = lzip(*days.index.values)[0]
+    firstDay = min(X)
+    Ys = [0, ]*((max(X) - firstDay).days + 1)
+    days = pd.Series([firstDay + timedelta(days=i)
+                      for i in range(len(Ys))])
+    for x, y in zip(X, Y):
+        Ys[(x - firstDay).days] = y
+    return days, np.array(Ys)
+
+
+def legacy_create_dataset(dataset, look_back=1):
+    X, Y = [], []
+    for i in range(len(dataset)-look_back-1):
+        a = dataset[i:(i+look_back), 0]
+        X.append(a)
+        Y.append(dataset[i + look_back, 0])
+    return np.array(X), np.array(Y)
+
+
+def synthetic_issues(years, count, seed=0):
+    rng = np.random.default_rng(seed)
+    last_day = date.today()
+    created = [last_day - timedelta(days=int(offset)) for offset in rng.integers(0, 365 * years, count)]
+    issues = []
+    for number, day in enumerate(created):
+        closed = day + timedelta(days=int(rng.integers(0, 90))) if rng.random() < 0.7 else None
+        issues.append({
+            "issue_number": number,
+            "created_at": str(day),
+            "closed_at": str(closed) if closed and closed <= last_day else None,
+        })
+    return issues
+
+
+def timed(function, *args, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def scale(counts):
+    Ys = counts.astype('float32').reshape(-1, 1)
+    return (Ys - Ys.min()) / (Ys.max() - Ys.min())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--issues', type=int, default=50000)
+    parser.add_argument('--look-back', type=int, default=30)
+    args = parser.parse_args()
+    # The legacy path assigns to a slice, as forecast() did
+    pd.options.mode.chained_assignment = None
+
+    issues = synthetic_issues(args.years, args.issues)
+    for column in ['created_at', 'closed_at']:
+        (legacy_days, legacy_counts), legacy_time = timed(legacy_daily_series, issues, column)
+        (days, counts), new_time = timed(preprocessing.daily_series, issues, column)
+        assert np.array_equal(legacy_counts, counts)
+        assert np.array_equal(legacy_days.values.astype('datetime64[D]'), days)
+        print(f'daily series {column}: {len(counts)} days, legacy {legacy_time * 1000:.1f} ms, '
+              f'new {new_time * 1000:.1f} ms ({legacy_time / new_time:.0f}x)')
+
+        Ys = scale(counts)
+        (legacy_X, legacy_Y), legacy_time = timed(legacy_create_dataset, Ys, args.look_back)
+        (X, Y), new_time = timed(preprocessing.create_dataset, Ys, args.look_back)
+        assert np.array_equal(legacy_X, X) and np.array_equal(legacy_Y, Y)
+        print(f'windows {column}: {X.shape}, legacy {legacy_time * 1000:.1f} ms, '
+              f'new {new_time * 1000:.3f} ms ({legacy_time / new_time:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
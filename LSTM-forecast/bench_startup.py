@@ -0,0 +1,91 @@
+'''
+Start up benchmark of the LSTM microservice.
+1. Imports app.py in fresh interpreters and reports the best and median import time, next to the time the
+   heavy packages take to import eagerly (what every cold start paid before they were deferred).
+2. Optionally starts the server (python app.py) and reports how long until "/healthz" first answers and
+   until it reports ready.
+3. Exits with an error when the import takes longer than --max-import-seconds, so a heavy package that is
+   imported at module level again is caught.
+Run it from the LSTM-forecast folder:
+    python bench_startup.py --runs 5 --serve --max-import-seconds 2
+'''
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+
+HEAVY_MODULES = ['tensorflow', 'keras', 'sklearn.preprocessing', 'matplotlib.pyplot', 'pandas', 'google.cloud.storage']
+
+
+def import_time(statement):
+    code = 'import time; start = time.perf_counter(); ' + statement + '; print(time.perf_counter() - start)'
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure(statement, runs):
+    times = [import_time(statement) for i in range(runs)]
+    return min(times), statistics.median(times)
+
+
+def healthz(port):
+    try:
+        with urllib.request.urlopen('http://127.0.0.1:' + str(port) + '/healthz', timeout=1) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+def serve_time(port, timeout):
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'app.py'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_answer = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                status, state = healthz(port)
+            except OSError:
+                time.sleep(0.05)
+                continue
+            if first_answer is None:
+                first_answer = time.perf_counter() - start
+            if state["status"] in ('ready', 'failed'):
+                return first_answer, time.perf_counter() - start, state
+            time.sleep(0.1)
+        return first_answer, None, None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--serve', action='store_true')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--max-import-seconds', type=float, default=None)
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    best, median = measure('import app', args.runs)
+    print(f'import app: best {best:.2f} s, median {median:.2f} s')
+    heavy_best, heavy_median = measure('; '.join('import ' + name for name in HEAVY_MODULES), args.runs)
+    print(f'eager import of {", ".join(HEAVY_MODULES)}: best {heavy_best:.2f} s, median {heavy_median:.2f} s')
+
+    if args.serve:
+        first_answer, ready, state = serve_time(args.port, args.timeout)
+        print(f'/healthz first answer after {first_answer} s, ready after {ready} s, state {state}')
+
+    if args.max_import_seconds is not None and median > args.max_import_seconds:
+        print(f'import app takes {median:.2f} s, more than {args.max_import_seconds} s')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+'''
+In memory chart rendering of the LSTM microservice.
+1. figure() creates a matplotlib Figure that is not registered with pyplot. The handlers draw on its axes,
+   never through pyplot's current figure, which is shared by every thread, so concurrent requests cannot
+   draw into each other's charts.
+2. png() renders a figure into a BytesIO buffer with the Agg backend, so no file is written, and the figure
+   is freed with the request.
+'''
+import io
+from lazy_imports import LazyModule
+
+matplotlib_figure = LazyModule('matplotlib.figure')
+backend_agg = LazyModule('matplotlib.backends.backend_agg')
+
+
+def load():
+    for module in [matplotlib_figure, backend_agg]:
+        module.load()
+
+
+def figure(figsize):
+    '''
+    New figure of figsize (width, height) in inches, rendered with Agg
+    '''
+    new_figure = matplotlib_figure.Figure(figsize=figsize)
+    backend_agg.FigureCanvasAgg(new_figure)
+    return new_figure
+
+
+def png(figure):
+    '''
+    PNG bytes of figure
+    '''
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
@@ -0,0 +1,257 @@
+'''
+Storage of the chart images of the LSTM microservice.
+1. Images are uploaded from memory (see charts.py), nothing goes through the static/images folder.
+2. STORAGE_BACKEND selects where they are stored:
+   "gcs" (default) uploads them to the BUCKET_NAME bucket of Google Cloud Storage, served from BASE_IMAGE_PATH.
+   "local" writes them to LOCAL_STORAGE_PATH, served by this app from LOCAL_STORAGE_URL, for local runs and tests.
+3. upload_all() uploads all images of a request concurrently, on up to UPLOAD_WORKERS threads.
+4. Images are stored under the hash of their content, not under their chart name. An identical chart is
+   stored once and never uploaded again (the storage is asked whether it exists first), its URL never changes
+   and can be cached for good, and concurrent requests for the same repository cannot overwrite each other.
+5. There is one storage per process: for "gcs" one authenticated client and bucket handle, created by
+   connect() at start up and shared by all requests and upload threads. Set STORAGE_EMULATOR_HOST to use a
+   local Google Cloud Storage emulator instead of the real service (no credentials are needed then).
+6. Charts shown by another endpoint than the one that draws them (the commit charts of "/api/pulls") are
+   published: upload_all(images, publish=True) also writes a small pointer object POINTER_PREFIX + chart name
+   holding the content name of the newest image, and published_urls() reads it back on any instance.
+7. metrics() reports the count and latency (mean, p50, p95, max) of the uploads and existence checks,
+   and how many uploads were skipped because the image was already stored.
+'''
+import os
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from lazy_imports import LazyModule
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'gcs')
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', '8'))
+# Number of latest calls the latency percentiles are computed from
+METRICS_WINDOW = int(os.environ.get('STORAGE_METRICS_WINDOW', '1000'))
+# Pointers to the newest image of every published chart name
+POINTER_PREFIX = 'latest/'
+# The content of a content name never changes, a pointer changes with every publish
+IMMUTABLE = 'public, max-age=31536000, immutable'
+NO_CACHE = 'no-cache'
+
+gcs = LazyModule('google.cloud.storage')
+google_credentials = LazyModule('google.auth.credentials')
+gcs_exceptions = LazyModule('google.cloud.exceptions')
+
+
+class GCSStorage:
+    def __init__(self, bucket_name, base_url, project_id):
+        self.bucket_name = bucket_name
+        self.base_url = base_url
+        self.project_id = project_id
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            if self._bucket is None:
+                if os.environ.get('STORAGE_EMULATOR_HOST'):
+                    client = gcs.Client(project=self.project_id,
+                                        credentials=google_credentials.AnonymousCredentials())
+                else:
+                    client = gcs.Client(project=self.project_id)
+                # client.bucket() only builds the handle, get_bucket() would fetch the bucket metadata every time
+                self._bucket = client.bucket(self.bucket_name)
+            return self._bucket
+
+    def bucket(self):
+        return self._bucket or self.connect()
+
+    def exists(self, name):
+        return self.bucket().blob(name).exists()
+
+    def upload(self, name, data, content_type='image/png', cache_control=IMMUTABLE):
+        blob = self.bucket().blob(name)
+        blob.cache_control = cache_control
+        blob.upload_from_string(data, content_type=content_type)
+        return self.url(name)
+
+    def read(self, name):
+        try:
+            return self.bucket().blob(name).download_as_bytes()
+        except gcs_exceptions.NotFound:
+            return None
+
+    def url(self, name):
+        return self.base_url + name
+
+
+class LocalStorage:
+    def __init__(self, directory, base_url):
+        self.directory = directory
+        self.base_url = base_url
+
+    def connect(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.directory, name))
+
+    def upload(self, name, data, content_type='image/png', cache_control=IMMUTABLE):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so the image is never served half written
+        temporary_path = path + '.' + str(threading.get_ident()) + '.tmp'
+        with open(temporary_path, 'wb') as output:
+            output.write(data)
+        os.replace(temporary_path, path)
+        return self.url(name)
+
+    def read(self, name):
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as input_file:
+            return input_file.read()
+
+    def url(self, name):
+        return self.base_url + name
+
+
+def create_storage(backend=None):
+    backend = backend or STORAGE_BACKEND
+    if backend == 'gcs':
+        return GCSStorage(os.environ.get('BUCKET_NAME', 'Your_BUCKET_NAME'),
+                          os.environ.get('BASE_IMAGE_PATH', 'Your_Base_Image_path'),
+                          os.environ.get('GOOGLE_CLOUD_PROJECT', 'steel-ace-369218'))
+    if backend == 'local':
+        return LocalStorage(os.environ.get('LOCAL_STORAGE_PATH', 'static/images'),
+                            os.environ.get('LOCAL_STORAGE_URL', '/static/images/'))
+    raise ValueError('Unknown STORAGE_BACKEND ' + backend)
+
+
+class LatencyMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._counters = {}
+
+    def count(self, counter):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + 1
+
+    def record(self, operation, seconds):
+        with self._lock:
+            entry = self._operations.setdefault(operation, {"count": 0, "total": 0.0, "max": 0.0,
+                                                            "latest": deque(maxlen=METRICS_WINDOW)})
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["latest"].append(seconds)
+
+    def timed(self, operation, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.record(operation, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            result = dict(self._counters)
+            for operation, entry in self._operations.items():
+                latest = sorted(entry["latest"])
+                result[operation] = {
+                    "count": entry["count"],
+                    "mean_ms": 1000 * entry["total"] / entry["count"],
+                    "p50_ms": 1000 * latest[len(latest) // 2],
+                    "p95_ms": 1000 * latest[min(len(latest) - 1, int(len(latest) * 0.95))],
+                    "max_ms": 1000 * entry["max"],
+                }
+            return result
+
+
+_storage = None
+_lock = threading.Lock()
+_metrics = LatencyMetrics()
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
+# Content names known to be stored
+_stored = set()
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def connect():
+    '''
+    Create the storage (and for "gcs" its client and bucket handle) now instead of on the first upload
+    '''
+    get_storage().connect()
+
+
+def metrics():
+    result = _metrics.snapshot()
+    result["backend"] = STORAGE_BACKEND
+    result["known_images"] = len(_stored)
+    return result
+
+
+def base_url():
+    return get_storage().url('')
+
+
+def content_name(data, extension='.png'):
+    return hashlib.sha256(data).hexdigest()[:32] + extension
+
+
+def store(storage, data):
+    name = content_name(data)
+    if name in _stored:
+        _metrics.count('skipped_uploads')
+    else:
+        if _metrics.timed('exists', storage.exists, name):
+            _metrics.count('skipped_uploads')
+        else:
+            _metrics.timed('upload', storage.upload, name, data)
+        with _lock:
+            _stored.add(name)
+    return storage.url(name)
+
+
+def publish(storage, name, data):
+    _metrics.timed('publish', storage.upload, POINTER_PREFIX + name, content_name(data).encode(), 'text/plain', NO_CACHE)
+
+
+def upload_all(images, publish_charts=False):
+    '''
+    images maps chart names to PNG bytes. Stores them all concurrently and returns their URLs by chart name.
+    With publish_charts the chart names then point to these images (see published_urls())
+    '''
+    storage = get_storage()
+    futures = {name: _executor.submit(store, storage, data) for name, data in images.items()}
+    urls = {name: future.result() for name, future in futures.items()}
+    if publish_charts:
+        for future in [_executor.submit(publish, storage, name, data) for name, data in images.items()]:
+            future.result()
+    return urls
+
+
+def published_url(storage, name):
+    try:
+        content = _metrics.timed('resolve', storage.read, POINTER_PREFIX + name)
+    except Exception:
+        # The chart is optional for the endpoint showing it, a storage error only leaves it out
+        _metrics.count('resolve_errors')
+        return None
+    return None if content is None else storage.url(content.decode().strip())
+
+
+def published_urls(names):
+    '''
+    URL of the newest image published under every chart name, None for a chart that was never published
+    '''
+    storage = get_storage()
+    futures = {name: _executor.submit(published_url, storage, name) for name in names}
+    return {name: future.result() for name, future in futures.items()}
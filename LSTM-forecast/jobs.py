@@ -0,0 +1,124 @@
+'''
+Asynchronous training jobs for the LSTM microservice.
+1. submit() records a forecast request as a job in a local sqlite queue (JOBS_DB_PATH) and returns its id at once.
+2. Jobs run on a pool of JOB_WORKERS worker processes, so TensorFlow and matplotlib of different jobs
+   do not share one interpreter and its GIL. Workers are started with "spawn", TensorFlow is not fork safe.
+3. The state of every job (queued, running, done, failed) and its result are kept in the queue.
+   Jobs that were queued or running when the service stopped are submitted again by start().
+'''
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+JOBS_DB_PATH = os.environ.get('JOBS_DB_PATH', 'jobs.sqlite3')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+
+# Names of the functions in app.py that run each kind of job
+JOB_KINDS = {
+    "forecast": "forecast_issues",
+    "pulls": "forecast_pulls",
+    "commits": "forecast_commits",
+    "all": "forecast_all",
+    "daily": "forecast_issue_types",
+}
+
+_lock = threading.Lock()
+_connection = None
+_executor = None
+
+
+def run_job(job_id, kind, body):
+    '''
+    Runs inside a worker process
+    '''
+    connection = sqlite3.connect(JOBS_DB_PATH, timeout=30)
+    connection.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?', ('running', time.time(), job_id))
+    connection.commit()
+    connection.close()
+    import app
+    return getattr(app, JOB_KINDS[kind])(body)
+
+
+def execute(sql, parameters=()):
+    with _lock:
+        rows = _connection.execute(sql, parameters).fetchall()
+        _connection.commit()
+    return rows
+
+
+def set_state(job_id, status, result=None, error=None):
+    execute('UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?',
+            (status, None if result is None else json.dumps(result), error, time.time(), job_id))
+
+
+def enqueue(job_id, kind, body):
+    def finished(future):
+        try:
+            set_state(job_id, 'done', result=future.result())
+        except Exception as error:
+            set_state(job_id, 'failed', error=repr(error))
+
+    _executor.submit(run_job, job_id, kind, body).add_done_callback(finished)
+
+
+def start():
+    '''
+    Open the queue, start the worker pool and resubmit the jobs that never finished. Safe to call more than once.
+    '''
+    global _connection, _executor
+    with _lock:
+        if _executor is not None:
+            return
+        _connection = sqlite3.connect(JOBS_DB_PATH, timeout=30, check_same_thread=False)
+        _connection.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT,
+                body TEXT,
+                status TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL,
+                updated_at REAL
+            )''')
+        _connection.commit()
+        _executor = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    unfinished = execute("SELECT id, kind, body FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at")
+    for job_id, kind, body in unfinished:
+        enqueue(job_id, kind, json.loads(body))
+
+
+def submit(kind, body):
+    start()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    # The job is stored before it is handed to the pool, so a restart cannot lose it
+    execute('INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, json.dumps(body), 'queued', None, None, now, now))
+    enqueue(job_id, kind, body)
+    return job_id
+
+
+def status(job_id):
+    '''
+    Return the state of a job as a dict, or None if there is no such job
+    '''
+    start()
+    rows = execute('SELECT id, kind, status, result, error, created_at, updated_at FROM jobs WHERE id = ?', (job_id,))
+    if not rows:
+        return None
+    job_id, kind, state, result, error, created_at, updated_at = rows[0]
+    return {
+        "id": job_id,
+        "kind": kind,
+        "status": state,
+        "result": None if result is None else json.loads(result),
+        "error": error,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
@@ -0,0 +1,42 @@
+'''
+Deferred imports for the LSTM microservice.
+TensorFlow, Keras, scikit-learn, matplotlib, pandas and Google Cloud Storage take seconds to import.
+app.py binds them to the stand-ins below, so the packages are only imported on first use (or by the warm up
+after start up, see warmup.py) and not every time app.py is imported.
+'''
+import importlib
+
+
+class LazyModule:
+    '''
+    Stands in for a module, the module is imported on first attribute access
+    '''
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        # Only called for attributes the stand-in does not have itself
+        if attribute.startswith('_'):
+            raise AttributeError(attribute)
+        return getattr(self.load(), attribute)
+
+
+class LazyAttribute:
+    '''
+    Stands in for a class or function of a module, the module is imported on the first call
+    '''
+    def __init__(self, module_name, attribute):
+        self._module = LazyModule(module_name)
+        self._attribute = attribute
+
+    def load(self):
+        return getattr(self._module.load(), self._attribute)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
@@ -0,0 +1,171 @@
+'''
+Registry of trained LSTM models for the LSTM microservice.
+1. A trained model is stored on local disk (MODEL_REGISTRY_PATH) under its repository, series type
+   (created_at, closed_at, pulls, commits), a hash of its hyperparameters and a fingerprint of its training data.
+   Every entry holds the model weights, the fitted scaler and the loss history used for the loss charts.
+2. fit_with_registry() returns the stored model when the same data was already trained with the same
+   hyperparameters, so nothing is retrained.
+3. When the data changed only slightly (its length is within WARM_START_TOLERANCE of the latest entry),
+   training starts from the latest weights and runs FINE_TUNE_EPOCHS epochs instead of the full schedule.
+4. Every entry also holds inference.npz, the model and scaler exported for numpy_lstm, so serve.py can
+   answer forecasts from the registry without TensorFlow.
+5. Only the latest entry and the MODEL_REGISTRY_HISTORY entries saved before it are kept for every repository,
+   series and hyperparameters, older entries are deleted when a new one is saved.
+'''
+import os
+import json
+import time
+import pickle
+import shutil
+import hashlib
+import threading
+import numpy_lstm
+
+REGISTRY_PATH = os.environ.get('MODEL_REGISTRY_PATH', 'models')
+FINE_TUNE_EPOCHS = int(os.environ.get('FINE_TUNE_EPOCHS', '3'))
+WARM_START_TOLERANCE = float(os.environ.get('WARM_START_TOLERANCE', '0.1'))
+# Entries kept besides the latest one, for every repository, series and hyperparameters
+HISTORY = int(os.environ.get('MODEL_REGISTRY_HISTORY', '2'))
+# An entry without meta.json older than this (in seconds) was left by a failed save, not one in progress
+INCOMPLETE_MAX_AGE = 3600
+
+
+def fingerprint(*values):
+    '''
+    Hash of the training data: numpy arrays are hashed by their bytes, anything else by its str()
+    '''
+    digest = hashlib.sha256()
+    for value in values:
+        if hasattr(value, 'tobytes'):
+            digest.update(str(value.dtype).encode())
+            digest.update(str(value.shape).encode())
+            digest.update(value.tobytes())
+        else:
+            digest.update(str(value).encode())
+    return digest.hexdigest()[:32]
+
+
+def hyperparameters_hash(hyperparameters):
+    return hashlib.sha256(json.dumps(hyperparameters, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def series_path(repo_name, series, hyperparameters):
+    return os.path.join(REGISTRY_PATH, repo_name.replace('/', '__'), series, hyperparameters_hash(hyperparameters))
+
+
+def read_entry(path):
+    meta_path = os.path.join(path, 'meta.json')
+    # meta.json is written last, an entry without it is incomplete
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as meta_file:
+        entry = json.load(meta_file)
+    entry["weights"] = os.path.join(path, 'weights.h5')
+    entry["inference"] = os.path.join(path, 'inference.npz')
+    entry["path"] = path
+    return entry
+
+
+def lookup(repo_name, series, hyperparameters, data_fingerprint):
+    return read_entry(os.path.join(series_path(repo_name, series, hyperparameters), data_fingerprint))
+
+
+def latest(repo_name, series, hyperparameters):
+    latest_path = os.path.join(series_path(repo_name, series, hyperparameters), 'latest')
+    if not os.path.exists(latest_path):
+        return None
+    with open(latest_path) as latest_file:
+        return lookup(repo_name, series, hyperparameters, latest_file.read().strip())
+
+
+def newest(repo_name, series):
+    '''
+    The most recently saved entry of a series, whatever its hyperparameters
+    '''
+    path = os.path.join(REGISTRY_PATH, repo_name.replace('/', '__'), series)
+    if not os.path.isdir(path):
+        return None
+    latest_paths = [os.path.join(path, name, 'latest') for name in os.listdir(path)]
+    latest_paths = [latest_path for latest_path in latest_paths if os.path.exists(latest_path)]
+    if not latest_paths:
+        return None
+    latest_path = max(latest_paths, key=os.path.getmtime)
+    with open(latest_path) as latest_file:
+        return read_entry(os.path.join(os.path.dirname(latest_path), latest_file.read().strip()))
+
+
+def load_scaler(entry):
+    with open(os.path.join(entry["path"], 'scaler.pkl'), 'rb') as scaler_file:
+        return pickle.load(scaler_file)
+
+
+def write_file(path, write, mode='w'):
+    # Write to a temporary file first so concurrent readers never see a partial file
+    temporary_path = path + '.' + str(os.getpid()) + '.' + str(threading.get_ident()) + '.tmp'
+    with open(temporary_path, mode) as output:
+        write(output)
+    os.replace(temporary_path, path)
+
+
+def prune(base_path, latest_fingerprint):
+    '''
+    Delete the entries of base_path older than the latest one and the HISTORY entries before it
+    '''
+    now = time.time()
+    entries = []
+    for name in os.listdir(base_path):
+        path = os.path.join(base_path, name)
+        if name == latest_fingerprint or not os.path.isdir(path):
+            continue
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            entries.append((os.path.getmtime(meta_path), path))
+        elif now - os.path.getmtime(path) > INCOMPLETE_MAX_AGE:
+            shutil.rmtree(path, ignore_errors=True)
+    entries.sort(reverse=True)
+    for _, path in entries[HISTORY:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def save(repo_name, series, hyperparameters, data_fingerprint, model, scaler, history, length):
+    base_path = series_path(repo_name, series, hyperparameters)
+    path = os.path.join(base_path, data_fingerprint)
+    os.makedirs(path, exist_ok=True)
+    weights_path = os.path.join(path, 'weights.' + str(os.getpid()) + '.' + str(threading.get_ident()) + '.h5')
+    model.save_weights(weights_path)
+    os.replace(weights_path, os.path.join(path, 'weights.h5'))
+    write_file(os.path.join(path, 'scaler.pkl'), lambda output: pickle.dump(scaler, output), mode='wb')
+    write_file(os.path.join(path, 'inference.npz'), lambda output: numpy_lstm.export(model, output, scaler), mode='wb')
+    meta = {
+        "repo": repo_name,
+        "series": series,
+        "hyperparameters": hyperparameters,
+        "fingerprint": data_fingerprint,
+        "length": length,
+        "history": {name: [float(value) for value in values] for name, values in history.items()},
+    }
+    write_file(os.path.join(path, 'meta.json'), lambda output: json.dump(meta, output))
+    write_file(os.path.join(base_path, 'latest'), lambda output: output.write(data_fingerprint))
+    prune(base_path, data_fingerprint)
+    return read_entry(path)
+
+
+def fit_with_registry(model, repo_name, series, hyperparameters, data_fingerprint, length, scaler, fit):
+    '''
+    Give model trained weights for this data and return its loss history (a dict like keras History.history).
+    fit(model, epochs) trains the model and returns its loss history.
+    '''
+    entry = lookup(repo_name, series, hyperparameters, data_fingerprint)
+    if entry is not None:
+        model.load_weights(entry["weights"])
+        return entry["history"]
+
+    epochs = hyperparameters["epochs"]
+    previous = latest(repo_name, series, hyperparameters)
+    if previous is not None and abs(length - previous["length"]) <= WARM_START_TOLERANCE * previous["length"]:
+        # Warm start: fine tune the latest weights on the new data
+        model.load_weights(previous["weights"])
+        epochs = FINE_TUNE_EPOCHS
+    history = fit(model, epochs)
+    save(repo_name, series, hyperparameters, data_fingerprint, model, scaler, history, length)
+    return history
@@ -0,0 +1,140 @@
+'''
+TensorFlow free inference of the LSTM microservice models.
+1. export() writes a trained Keras model (LSTM, Dropout and Dense layers) and its MinMaxScaler to a small
+   .npz file: the layer weights, their activations and the scaler parameters. It only reads the weights of
+   the model, TensorFlow is not imported here.
+2. NumpyModel runs the same forward pass with NumPy (Keras gate order i, f, c, o), so a forecast can be
+   served in milliseconds by a process that never loads TensorFlow (see serve.py).
+3. NumpyModel.forecast() is the NumPy version of rollout.rollout(): each prediction is fed back as the newest input.
+'''
+import json
+import numpy as np
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "hard_sigmoid": lambda x: np.clip(0.2 * x + 0.5, 0, 1),
+}
+
+
+def export(model, output, scaler=None):
+    '''
+    Write the inference weights of model to output, a file opened in binary mode
+    '''
+    layers = []
+    arrays = {}
+    for index, layer in enumerate(model.layers):
+        kind = layer.__class__.__name__
+        if kind in ('Dropout', 'InputLayer'):
+            # Dropout does nothing at inference
+            continue
+        if kind not in ('LSTM', 'Dense'):
+            raise ValueError('Cannot export layer ' + kind)
+        config = layer.get_config()
+        description = {"kind": kind, "activation": config.get("activation", "linear")}
+        if kind == 'LSTM':
+            description["recurrent_activation"] = config.get("recurrent_activation", "sigmoid")
+            description["return_sequences"] = bool(config.get("return_sequences", False))
+        for name, weights in zip(['kernel', 'recurrent_kernel', 'bias'] if kind == 'LSTM' else ['kernel', 'bias'],
+                                 layer.get_weights()):
+            arrays['layer' + str(index) + '_' + name] = weights
+        description["index"] = index
+        layers.append(description)
+    header = {"layers": layers, "input_shape": [int(size) for size in model.input_shape[1:]]}
+    if scaler is not None:
+        arrays["scaler_scale"] = scaler.scale_
+        arrays["scaler_min"] = scaler.min_
+    np.savez(output, header=np.array(json.dumps(header)), **arrays)
+
+
+class NumpyModel:
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        header = json.loads(str(arrays.pop("header")))
+        self.layers = header["layers"]
+        self.input_shape = tuple(header["input_shape"])
+        self.weights = arrays
+        self.scale = arrays.get("scaler_scale")
+        self.min = arrays.get("scaler_min")
+
+    def layer_weight(self, layer, name):
+        return self.weights['layer' + str(layer["index"]) + '_' + name]
+
+    def lstm(self, layer, inputs):
+        kernel = self.layer_weight(layer, 'kernel')
+        recurrent_kernel = self.layer_weight(layer, 'recurrent_kernel')
+        bias = self.layer_weight(layer, 'bias')
+        activation = ACTIVATIONS[layer["activation"]]
+        recurrent_activation = ACTIVATIONS[layer["recurrent_activation"]]
+        units = recurrent_kernel.shape[0]
+        state = np.zeros((inputs.shape[0], units), dtype=inputs.dtype)
+        carry = np.zeros((inputs.shape[0], units), dtype=inputs.dtype)
+        # The input projection of every time step is one matrix product
+        projected = inputs @ kernel + bias
+        outputs = []
+        for step in range(inputs.shape[1]):
+            gates = projected[:, step] + state @ recurrent_kernel
+            input_gate = recurrent_activation(gates[:, :units])
+            forget_gate = recurrent_activation(gates[:, units:2 * units])
+            carry = forget_gate * carry + input_gate * activation(gates[:, 2 * units:3 * units])
+            state = recurrent_activation(gates[:, 3 * units:]) * activation(carry)
+            outputs.append(state)
+        return np.stack(outputs, axis=1) if layer["return_sequences"] else state
+
+    def predict(self, inputs):
+        '''
+        inputs has shape (batch, *input_shape), like the input of the Keras model
+        '''
+        outputs = np.asarray(inputs, dtype='float32')
+        for layer in self.layers:
+            if layer["kind"] == 'LSTM':
+                outputs = self.lstm(layer, outputs)
+            else:
+                outputs = ACTIVATIONS[layer["activation"]](
+                    outputs @ self.layer_weight(layer, 'kernel') + self.layer_weight(layer, 'bias'))
+        return outputs
+
+    def transform(self, values):
+        values = np.asarray(values, dtype='float32')
+        return values if self.scale is None else values * self.scale + self.min
+
+    def inverse_transform(self, values):
+        return values if self.scale is None else (values - self.min) / self.scale
+
+    def model_input(self, history):
+        '''
+        The model input for the newest values of history (time, series).
+        The pulls, commits and all series models read time steps of series values, the issues model reads
+        a single time step holding the last look_back days.
+        '''
+        steps, features = self.input_shape
+        needed = steps if features == history.shape[1] else features
+        if len(history) < needed:
+            raise ValueError('the model needs at least ' + str(needed) + ' values')
+        if features == history.shape[1]:
+            return history[-steps:]
+        return history[-features:, 0].reshape(steps, features)
+
+    def rollout(self, history, horizon):
+        '''
+        Scaled history (time, series) followed by the next horizon predictions, returns the predictions
+        '''
+        buffer = np.zeros((len(history) + horizon, history.shape[1]), dtype='float32')
+        buffer[:len(history)] = history
+        for step in range(horizon):
+            end = len(history) + step
+            buffer[end] = self.predict(self.model_input(buffer[:end])[np.newaxis])[0]
+        return buffer[len(history):]
+
+    def forecast(self, values, horizon):
+        '''
+        Raw values (time,) or (time, series) in, the next horizon raw values out
+        '''
+        values = np.asarray(values, dtype='float32')
+        single = values.ndim == 1
+        history = self.transform(values.reshape(len(values), -1))
+        predictions = self.inverse_transform(self.rollout(history, horizon))
+        return predictions[:, 0] if single else predictions
@@ -0,0 +1,68 @@
+'''
+Preprocessing stage of the LSTM microservice.
+1. daily_series() turns issue records into a dense daily count series (zeros on days without issues)
+   with a single np.bincount, instead of filling a Python list day by day.
+2. create_dataset() builds the look-back windows as a read-only sliding_window_view of the series,
+   so no window is copied. The windows and targets are the same as the loop this replaces.
+3. aligned_daily_series() and create_multi_dataset() do the same for several series on one shared day axis,
+   stacked as the features of a single model.
+'''
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import aggregation
+
+
+def daily_series(issues, column):
+    '''
+    Return (days, counts): every day from the first to the last issue date in column ("created_at" or
+    "closed_at") as datetime64[D], and the number of issues on each of those days.
+    '''
+    first_day, counts = aggregation.daily_counts(aggregation.to_days([issue[column] for issue in issues]))
+    if first_day is None:
+        return np.array([], dtype='datetime64[D]'), counts
+    return first_day + np.arange(len(counts)), counts
+
+
+def create_dataset(dataset, look_back=1):
+    '''
+    Return (X, Y) with X[i] = dataset[i:i + look_back, 0] and Y[i] = dataset[i + look_back, 0]
+    for i in range(len(dataset) - look_back - 1).
+    '''
+    series = dataset[:, 0]
+    count = len(series) - look_back - 1
+    if count <= 0:
+        return np.empty((0, look_back), dtype=series.dtype), np.empty(0, dtype=series.dtype)
+    X = sliding_window_view(series, look_back)[:count]
+    Y = series[look_back:look_back + count]
+    return X, Y
+
+
+def aligned_daily_series(columns):
+    '''
+    Align several date columns on the same days.
+    columns maps a series name to a datetime64[D] array of event dates. Returns (days, counts) where
+    counts[i, j] is the number of events of the j-th series on days[i], zero filled from the first to the last day of any series.
+    '''
+    present = [aggregation.drop_missing(days) for days in columns.values()]
+    present_days = [days for days in present if len(days)]
+    if not present_days:
+        return np.array([], dtype='datetime64[D]'), np.zeros((0, len(columns)), dtype=np.int64)
+    first_day = min(days.min() for days in present_days)
+    last_day = max(days.max() for days in present_days)
+    length = (last_day - first_day).astype(np.int64) + 1
+    counts = np.stack([np.bincount((days - first_day).astype(np.int64), minlength=length) for days in present], axis=1)
+    return first_day + np.arange(length), counts
+
+
+def create_multi_dataset(dataset, look_back=1):
+    '''
+    Multi series version of create_dataset for a (days, series) dataset.
+    Returns X with shape (samples, look_back, series), a view of dataset, and Y with shape (samples, series).
+    '''
+    count = len(dataset) - look_back - 1
+    if count <= 0:
+        return (np.empty((0, look_back, dataset.shape[1]), dtype=dataset.dtype),
+                np.empty((0, dataset.shape[1]), dtype=dataset.dtype))
+    X = sliding_window_view(dataset, look_back, axis=0)[:count].transpose(0, 2, 1)
+    Y = dataset[look_back:look_back + count]
+    return X, Y
@@ -0,0 +1,45 @@
+'''
+Cache of complete responses of the LSTM microservice.
+1. The key is a fingerprint of everything a response depends on: the endpoint, the repository, the
+   aggregated series the model and charts are built from, and the model configuration.
+2. A repeated request with the same data gets the cached response back without any TensorFlow or matplotlib work.
+3. The cache holds at most RESPONSE_CACHE_SIZE responses (least recently used are evicted first),
+   each for at most RESPONSE_CACHE_TTL seconds.
+'''
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+import model_registry
+
+CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '128'))
+CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '3600'))
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def cache_key(endpoint, repo_name, config, *series):
+    return model_registry.fingerprint(endpoint, repo_name, json.dumps(config, sort_keys=True), *series)
+
+
+def get(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.time() - stored_at > CACHE_TTL:
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return response
+
+
+def put(key, response):
+    with _lock:
+        _entries[key] = (time.time(), response)
+        _entries.move_to_end(key)
+        while len(_entries) > CACHE_SIZE:
+            _entries.popitem(last=False)
@@ -0,0 +1,79 @@
+'''
+Multi-step forecasts of the LSTM microservice.
+1. rollout() predicts `horizon` steps ahead by feeding every prediction back as the newest input, like the
+   month by month model.predict loop of pulls() and commits(), but the whole horizon runs in one compiled
+   tf.function call instead of one Keras predict call (and one np.append) per step.
+2. Every step slides the input window by one row (a new window tensor the size of the input) and writes its
+   prediction into a TensorArray, which is stacked once at the end.
+3. Many series can be rolled out at once, one per row of the batch.
+4. A request builds a new model every time, so the compiled function is kept per architecture (the model config
+   without the generated layer names), not per model. It runs a template model of that architecture, which gets
+   the weights of the model of the request before every rollout, so only the first model of an architecture is traced.
+'''
+import json
+import threading
+import numpy as np
+from lazy_imports import LazyModule
+
+tf = LazyModule('tensorflow')
+
+# architecture -> (template model, compiled rollout of the template, lock of the template weights)
+_compiled = {}
+_lock = threading.Lock()
+
+
+def compile_rollout(model):
+    @tf.function(reduce_retracing=True)
+    def run(windows, horizon):
+        predictions = tf.TensorArray(windows.dtype, size=horizon)
+        window = windows
+        for step in tf.range(horizon):
+            prediction = tf.cast(model(window, training=False), windows.dtype)
+            predictions = predictions.write(step, prediction)
+            window = tf.concat([window[:, 1:], prediction[:, tf.newaxis]], axis=1)
+        # (horizon, series, features) -> (series, horizon, features)
+        return tf.transpose(predictions.stack(), [1, 0, 2])
+    return run
+
+
+def without_names(config):
+    if isinstance(config, dict):
+        return {key: without_names(value) for key, value in config.items() if key != 'name'}
+    if isinstance(config, list):
+        return [without_names(value) for value in config]
+    return config
+
+
+def architecture(model):
+    return type(model).__name__ + json.dumps(without_names(model.get_config()), sort_keys=True, default=str)
+
+
+def compiled(model):
+    key = architecture(model)
+    with _lock:
+        if key not in _compiled:
+            template = type(model).from_config(model.get_config())
+            if not template.built:
+                template.build(model.input_shape)
+            _compiled[key] = (template, compile_rollout(template), threading.Lock())
+        return _compiled[key]
+
+
+def rollout(model, windows, horizon):
+    '''
+    windows has shape (series, n_input, features) or (n_input, features) for a single series.
+    Returns the next `horizon` predictions of every series with shape (series, horizon, features),
+    or (horizon, features) for a single series.
+    '''
+    windows = np.asarray(windows, dtype='float32')
+    single = windows.ndim == 2
+    if single:
+        windows = windows[np.newaxis]
+    if horizon <= 0:
+        predictions = np.zeros((len(windows), 0, windows.shape[2]), dtype='float32')
+    else:
+        template, run, weights_lock = compiled(model)
+        with weights_lock:
+            template.set_weights(model.get_weights())
+            predictions = run(tf.constant(windows), tf.constant(horizon, dtype=tf.int32)).numpy()
+    return predictions[0] if single else predictions
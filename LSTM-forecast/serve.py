@@ -0,0 +1,69 @@
+'''
+Serving mode of the LSTM microservice: forecasts from already trained models without TensorFlow.
+1. Models trained by app.py are stored in the model registry together with their NumPy export (inference.npz).
+2. This app only imports Flask and NumPy, so it starts in well under a second and needs a fraction of
+   the memory of app.py. It does not train, it answers from the newest trained model of a series.
+3. Loaded models are kept in memory, a forecast is a few milliseconds of NumPy.
+Run it next to app.py (same MODEL_REGISTRY_PATH):
+    python serve.py
+'''
+import os
+import json
+import threading
+from flask import Flask, jsonify, request, Response
+from flask_cors import CORS
+import model_registry
+import numpy_lstm
+
+app = Flask(__name__)
+# Handles CORS (cross-origin resource sharing)
+CORS(app)
+
+_models = {}
+_lock = threading.Lock()
+
+
+def error_response(message, status_code):
+    resp = Response(json.dumps({"error": message}), mimetype='application/json')
+    resp.status_code = status_code
+    return resp
+
+
+def load_model(entry):
+    with _lock:
+        model = _models.get(entry["inference"])
+        if model is None:
+            model = _models[entry["inference"]] = numpy_lstm.NumpyModel(entry["inference"])
+        return model
+
+
+'''
+API route path is  "/api/predict"
+body: {"repo": "angular/angular", "series": "pulls", "values": [...], "horizon": 12}
+repo is "owner/name" for every series, the name the training requests send
+series is the series a model was trained on ("created_at", "closed_at", "pulls", "commits", or the
+"+" joined names of the "/api/forecast/all" model), values are its latest raw counts, oldest first
+(one list of counts per time step for the "all" model)
+'''
+@app.route('/api/predict', methods=['POST'])
+def predict():
+    body = request.get_json()
+    entry = model_registry.newest(body["repo"], body["series"])
+    if entry is None or not os.path.exists(entry["inference"]):
+        return error_response("Model Not Found", 404)
+    model = load_model(entry)
+    try:
+        predictions = model.forecast(body["values"], int(body.get("horizon", 1)))
+    except (ValueError, IndexError) as error:
+        return error_response("Invalid values: " + str(error), 400)
+    return jsonify({
+        "repo": body["repo"],
+        "series": body["series"],
+        "fingerprint": entry["fingerprint"],
+        "predictions": predictions.tolist(),
+    })
+
+
+# Run the serving app on port 8081, app.py uses 8080
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=int(os.environ.get('SERVE_PORT', '8081')))
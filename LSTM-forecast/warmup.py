@@ -0,0 +1,43 @@
+'''
+Start up of the LSTM microservice.
+1. app.py imports its heavy packages lazily (see lazy_imports.py), so the server binds its port right away.
+2. start() waits until the port accepts connections and then warms up in a background thread: it imports
+   the heavy packages and builds and runs a model once, so the first request does not pay for it.
+3. status() is returned by "/healthz", which answers 503 until the warm up is done and 200 once ready.
+'''
+import time
+import socket
+import threading
+
+_state = {"status": "starting", "started_at": time.time(), "ready_seconds": None, "error": None}
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def run(warm_up, port):
+    wait_for_port(port)
+    _state["status"] = "warming"
+    try:
+        warm_up()
+        _state["status"] = "ready"
+    except Exception as error:
+        _state["status"] = "failed"
+        _state["error"] = repr(error)
+    _state["ready_seconds"] = time.time() - _state["started_at"]
+
+
+def start(warm_up, port):
+    threading.Thread(target=run, args=(warm_up, port), daemon=True).start()
+
+
+def status():
+    return dict(_state)